@@ -19,7 +19,35 @@
 # WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-from Crypto.Hash import SHAKE256
+from . import metrics
+
+
+class BIP85DRNG(object):
+    """SHAKE256 reader that squeezes whole blocks and serves small reads from them."""
+    BLOCK_SIZE = 136 * 30  # a multiple of the SHAKE256 rate
+
+    def __init__(self, shake):
+        self._shake = shake
+        self._buffer = b''
+        self._pos = 0
+
+    def read(self, length):
+        start = self._pos
+        end = start + length
+        if end <= len(self._buffer):
+            self._pos = end
+            return self._buffer[start:end]
+        head = self._buffer[start:]
+        length -= len(head)
+        if length >= self.BLOCK_SIZE:
+            self._buffer = b''
+            self._pos = 0
+            with metrics.span("drng_squeeze"):
+                return head + self._shake.read(length)
+        with metrics.span("drng_squeeze"):
+            self._buffer = self._shake.read(self.BLOCK_SIZE)
+        self._pos = length
+        return head + self._buffer[:length]
 
 
 def new(entropy):
@@ -29,4 +57,5 @@ def new(entropy):
     if len(entropy) != 64:
         raise ValueError("BIP85DRNG input entropy must be exactly 512 bits.")
 
-    return SHAKE256.new(entropy)
+    from Crypto.Hash import SHAKE256
+    return BIP85DRNG(SHAKE256.new(entropy))
@@ -23,39 +23,255 @@
 import hmac
 import hashlib
 import math
-from mnemonic import Mnemonic as bip39
+import os
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import chain
 from .BIP85DRNG import new as DRNG
-from pycoin.symbols.btc import network as BTC
-from pycoin.encoding.bytes32 import from_bytes_32, to_bytes_32
-from .bip93 import CHARSET, ms32_recover, fingerprint, convertbits, ms32_interpolate, ms32_encode, validate_set
-import base58
+from . import metrics
+
+# mnemonic, pycoin, base58 and bip93 are imported where they are first needed:
+# building pycoin's BTC network alone dominates the startup time of the package.
+
+# secp256k1 group order, for hardened child derivation without pycoin
+_SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+def _check_secret(secret):
+    if not 0 < int.from_bytes(secret, 'big') < _SECP256K1_ORDER:
+        raise ValueError("ERROR: Derived private key is out of range")
+    return secret
+
+
+# Loaded Mnemonic instances by language; each reads and splits a wordlist file.
+_mnemonics = {}
+
+
+def _get_mnemonic(language):
+    m = _mnemonics.get(language)
+    if m is None:
+        from mnemonic import Mnemonic
+        m = _mnemonics.setdefault(language, Mnemonic(language))
+    return m
+
+
+def _bip39_word_indexes(data):
+    # BIP39: entropy followed by the first len(data) / 4 bits of its SHA256, in 11-bit words
+    checksum_bits = len(data) // 4
+    n = int.from_bytes(data, 'big') << checksum_bits | hashlib.sha256(data).digest()[0] >> (8 - checksum_bits)
+    words = (len(data) * 8 + checksum_bits) // 11
+    return [n >> 11 * (words - 1 - i) & 0x7FF for i in range(words)]
+
+
+def _b58encode_check(payload):
+    import base58
+    return base58.b58encode_check(payload).decode()
+
+
+# array typecodes for unpacking 1, 2 and 4 byte dice candidates
+_ROLL_TYPECODES = {array(code).itemsize: code for code in 'LIHB'}
+
+# top 5 bits of each DRNG byte, as one codex32 symbol per byte
+_TOP_5_BITS = bytes(b >> 3 for b in range(256))
 
 
 class BIP85(object):
+    def __init__(self, cache_size=128, seed_cache_size=0):
+        """cache_size bounds the LRU of parsed roots and derived parent nodes (0 disables it).
+
+        seed_cache_size opts in to keeping that many BIP39 seeds, so the PBKDF2 in
+        bip39_mnemonic_to_entropy runs once per (mnemonic, passphrase).
+        """
+        self._cache_size = cache_size
+        self._node_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._seed_cache_size = seed_cache_size
+        self._seed_cache = OrderedDict()
+        # Per-instance key so cache keys can't be used to test mnemonic guesses.
+        self._seed_cache_key = os.urandom(32)
+
     def _decorate_path(self, path):
         return path.replace("m/", "").replace("'", "p")
 
     def _get_k_from_node(self, node):
-        return to_bytes_32(node.secret_exponent())
+        return node.secret_exponent().to_bytes(32, 'big')
 
-    def _derive_k(self, path, xprv):
-        path = self._decorate_path(path)
-        node = xprv.subkey_for_path(path)
-        return self._get_k_from_node(node)
+    def _cache_get(self, key):
+        with self._cache_lock:
+            node = self._node_cache.get(key)
+            if node is not None:
+                self._node_cache.move_to_end(key)
+        if metrics.sink is not None:
+            metrics.count("node_cache", "miss" if node is None else "hit")
+        return node
+
+    def _cache_put(self, key, node):
+        if self._cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._node_cache[key] = node
+            self._node_cache.move_to_end(key)
+            while len(self._node_cache) > self._cache_size:
+                self._node_cache.popitem(last=False)
+
+    def _zeroise(self, seed):
+        # Best effort: copies made by the KDF and pycoin can't be wiped from Python.
+        seed[:] = bytes(len(seed))
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._node_cache.clear()
+            while self._seed_cache:
+                self._zeroise(self._seed_cache.popitem()[1])
+
+    def _get_seed(self, mnemonic, passphrase):
+        from mnemonic import Mnemonic as bip39
+        if self._seed_cache_size <= 0:
+            with metrics.span("bip39_seed"):
+                return None, bip39.to_seed(mnemonic, passphrase=passphrase)
+        seed_id = hmac.new(self._seed_cache_key, msg=f"{mnemonic}\0{passphrase}".encode(),
+                           digestmod=hashlib.sha256).digest()
+        with self._cache_lock:
+            seed = self._seed_cache.get(seed_id)
+            if seed is not None:
+                self._seed_cache.move_to_end(seed_id)
+        metrics.count("seed_cache", "miss" if seed is None else "hit")
+        if seed is not None:
+            return seed_id, bytes(seed)
+        with metrics.span("bip39_seed"):
+            seed = bytearray(bip39.to_seed(mnemonic, passphrase=passphrase))
+        with self._cache_lock:
+            self._seed_cache[seed_id] = seed
+            while len(self._seed_cache) > self._seed_cache_size:
+                self._zeroise(self._seed_cache.popitem(last=False)[1])
+        return seed_id, bytes(seed)
+
+    def _get_mnemonic_root(self, mnemonic, passphrase):
+        root_id, bip39_seed = self._get_seed(mnemonic, passphrase)
+        xprv = self._cache_get((root_id, ())) if root_id is not None else None
+        if xprv is None:
+            from pycoin.symbols.btc import network as BTC
+            xprv = BTC.keys.bip32_seed(bip39_seed)
+            if root_id is not None:
+                self._cache_put((root_id, ()), xprv)
+        return root_id, xprv
+
+    def _parse_path(self, path):
+        steps = []
+        for v in self._decorate_path(path).strip("/").split("/"):
+            if not v or v == "m":
+                continue
+            is_hardened = v[-1] in "'pH"
+            i = int(v[:-1] if is_hardened else v)
+            if not 0 <= i < 0x80000000:
+                raise ValueError(f"ERROR: Invalid path index {v}")
+            steps.append((i, is_hardened))
+        return steps
+
+    def _get_root(self, xprv_string):
+        # Roots are identified by a digest of the serialized key rather than the
+        # 32-bit BIP32 fingerprint, which can collide between unrelated roots.
+        root_id = hashlib.sha256(xprv_string.encode()).digest()
+        xprv = self._cache_get((root_id, ()))
+        if xprv is None:
+            from pycoin.symbols.btc import network as BTC
+            with metrics.span("parse_xprv"):
+                xprv = BTC.parse(xprv_string)
+            if xprv is None:
+                raise ValueError('ERROR: Invalid xprv')
+            self._cache_put((root_id, ()), xprv)
+        return root_id, xprv
+
+    def _derive_parent(self, steps, xprv, root_id=None):
+        # Resume from the longest cached prefix of steps, caching each new node.
+        depth = 0
+        node = xprv
+        if root_id is not None:
+            for depth in range(len(steps), 0, -1):
+                cached = self._cache_get((root_id, tuple(steps[:depth])))
+                if cached is not None:
+                    node = cached
+                    break
+            else:
+                depth = 0
+        for depth in range(depth, len(steps)):
+            i, is_hardened = steps[depth]
+            with metrics.span("derive_parent"):
+                node = node.subkey(i=i, is_hardened=is_hardened, as_private=True)
+            if root_id is not None:
+                self._cache_put((root_id, tuple(steps[:depth + 1])), node)
+        return node
+
+    def _derive_child_k(self, node, i, is_hardened):
+        # The leaf only needs its secret exponent, so skip building a BIP32Node.
+        # Hardened CKDpriv is done here so the hot path never touches pycoin.
+        if not is_hardened:
+            from pycoin.ecdsa.secp256k1 import secp256k1_generator
+            from pycoin.key.bip32 import subkey_secret_exponent_chain_code_pair
+            k, _ = subkey_secret_exponent_chain_code_pair(
+                secp256k1_generator, node.secret_exponent(), node.chain_code(), i, False, node.public_pair())
+            return k.to_bytes(32, 'big')
+        parent_k = node.secret_exponent()
+        i_bytes = (i | 0x80000000).to_bytes(4, 'big')
+        data = b'\x00' + parent_k.to_bytes(32, 'big') + i_bytes
+        while True:
+            I64 = hmac.new(node.chain_code(), data, hashlib.sha512).digest()
+            I_left = int.from_bytes(I64[:32], 'big')
+            k = (I_left + parent_k) % _SECP256K1_ORDER
+            if I_left < _SECP256K1_ORDER and k:
+                return k.to_bytes(32, 'big')
+            # BIP32: on an invalid key, retry with 0x01 || I_R || i
+            data = b'\x01' + I64[32:] + i_bytes
+
+    def _derive_k(self, path, xprv, root_id=None):
+        steps = self._parse_path(path)
+        if not steps:
+            return self._get_k_from_node(xprv)
+        node = self._derive_parent(steps[:-1], xprv, root_id)
+        return self._derive_child_k(node, *steps[-1])
+
+    def _derive_entropy(self, path, xprv, root_id=None):
+        steps = self._parse_path(path)
+        if not steps:
+            return self._hmac_sha512(self._get_k_from_node(xprv))
+        node = self._derive_parent(steps[:-1], xprv, root_id)
+        return self._derive_leaf_entropy(node, *steps[-1])
+
+    def _derive_leaf_entropy(self, node, i, is_hardened):
+        # Per-index hot path: only pay for spans while metrics are enabled.
+        if metrics.sink is None:
+            return self._hmac_sha512(self._derive_child_k(node, i, is_hardened))
+        with metrics.span("derive_leaf"):
+            k = self._derive_child_k(node, i, is_hardened)
+        with metrics.span("hmac_sha512"):
+            return self._hmac_sha512(k)
 
     def _hmac_sha512(self, message_k):
         return hmac.new(key=b'bip-entropy-from-k', msg=message_k, digestmod=hashlib.sha512).digest()
 
     def bip39_mnemonic_to_entropy(self, path, mnemonic, passphrase=''):
-        bip39_seed = bip39.to_seed(mnemonic, passphrase=passphrase)
-        xprv = BTC.keys.bip32_seed(bip39_seed)
-        return self._hmac_sha512(self._derive_k(path, xprv))
+        root_id, xprv = self._get_mnemonic_root(mnemonic, passphrase)
+        return self._derive_entropy(path, xprv, root_id)
+
+    def bip39_mnemonic_to_xprv(self, mnemonic, passphrase=''):
+        return self._get_mnemonic_root(mnemonic, passphrase)[1].hwif(as_private=True)
 
     def bip32_xprv_to_entropy(self, path, xprv_string):
-        xprv = BTC.parse(xprv_string)
-        if xprv is None:
-            raise ValueError('ERROR: Invalid xprv')
-        return self._hmac_sha512(self._derive_k(path, xprv))
+        root_id, xprv = self._get_root(xprv_string)
+        return self._derive_entropy(path, xprv, root_id)
+
+    def bip32_xprv_to_node(self, path, xprv_string):
+        root_id, xprv = self._get_root(xprv_string)
+        return self._derive_parent(self._parse_path(path), xprv, root_id)
+
+    def bip32_xprv_to_entropy_range(self, path, xprv_string, start, stop):
+        """Yield (index, entropy) for path/index' with start <= index < stop."""
+        if start < 0 or stop > 0x80000000:
+            raise ValueError("ERROR: Index must be between 0 and 2^31 - 1")
+        node = self.bip32_xprv_to_node(path, xprv_string)
+        for index in range(start, stop):
+            yield index, self._derive_leaf_entropy(node, index, True)
 
     def bip32_xprv_to_hex(self, path, width, xprv_string):
         # export entropy as hex
@@ -63,40 +279,57 @@ class BIP85(object):
         ent = self.bip32_xprv_to_entropy(path, xprv_string)
         return ent[0:width].hex()
 
-    def bip32_xprv_to_xprv(self, path, xprv_string):
+    def bip32_xprv_to_xprv(self, path, xprv_string, raw=False):
         path = self._decorate_path(path)
-        ent = self.bip32_xprv_to_entropy(path, xprv_string)
+        return self.entropy_to_xprv(self.bip32_xprv_to_entropy(path, xprv_string), raw)
 
+    def entropy_to_xprv(self, ent, raw=False):
+        """raw=True returns the (chain_code, private_key) bytes instead of the xprv string."""
         # From Peter Gray
         # Taking 64 bytes of the HMAC digest, the first 32 bytes are the chain code, and second 32 bytes are the private
         # key for BIP32 XPRV value. Child number, depth, and parent fingerprint are forced to zero.
+        chain_code = ent[:32]
+        private_key = _check_secret(ent[32:64])
+        if raw:
+            return chain_code, private_key
         prefix = b'\x04\x88\xad\xe4'
         depth = b'\x00'
         parent_fingerprint = b'\x00\x00\x00\x00'
         child_num = b'\x00\x00\x00\x00'
-        chain_code = ent[:32]
-        private_key = b'\x00' + ent[32:]
-        extended_key = prefix + depth + parent_fingerprint + child_num + chain_code + private_key
-        checksum = hashlib.sha256(hashlib.sha256(extended_key).digest()).digest()[:4]
-        derived_xprv_string = base58.b58encode(extended_key + checksum).decode()
-        node = BTC.parse(derived_xprv_string)
-
-        return node.hwif(as_private=True)
+        extended_key = prefix + depth + parent_fingerprint + child_num + chain_code + b'\x00' + private_key
+        return _b58encode_check(extended_key)
 
     def entropy_from_wif(self, wif):
+        from pycoin.symbols.btc import network as BTC
         node = BTC.keys.from_text(wif)
         return self._hmac_sha512(self._get_k_from_node(node))
 
+    def entropy_to_secret(self, entropy):
+        """The raw 32-byte private key that entropy_to_wif encodes."""
+        return _check_secret(entropy[:32])
+
     def entropy_to_wif(self, entropy):
-        return BTC.keys.private(secret_exponent=from_bytes_32(entropy[:32])).wif()
+        return self.secret_to_wif(self.entropy_to_secret(entropy))
+
+    def secret_to_wif(self, secret):
+        # mainnet prefix, 32-byte secret, compressed-pubkey flag
+        return _b58encode_check(b'\x80' + _check_secret(secret) + b'\x01')
+
+    def secrets_to_wif(self, secrets):
+        """Yield the WIF of each 32-byte secret in an iterable, without building key objects."""
+        return map(self.secret_to_wif, secrets)
 
     def entropy_to_bip39(self, entropy, words, language='english'):
         width = (words - 1) * 11 // 8 + 1
-        assert 16 <= width <= 32
-        m = bip39(language)
-        return m.to_mnemonic(entropy[:width])
+        if width not in (16, 20, 24, 28, 32):
+            raise ValueError(f"ERROR: Invalid number of words {words}, must be 12, 15, 18, 21 or 24")
+        m = _get_mnemonic(language)
+        return m.delimiter.join([m.wordlist[i] for i in _bip39_word_indexes(entropy[:width])])
     
-    def entropy_to_bip93(self, entropy, hrp='ms', threshold=2, n=3, byte_length=16, id=None):
+    def entropy_to_bip93(self, entropy, hrp='ms', threshold=2, n=3, byte_length=16, id=None, verify=True):
+        """verify=False replaces the decode of every output string with a structural check."""
+        from .bip93 import (CHARSET, fingerprint, convertbits, ms32_interpolate_bytes,
+                            ms32_encode, validate_set, validate_data_set)
         k = CHARSET.find(str(threshold))
         if threshold == 0 and n != 1:
             raise ValueError(f"Share count '{n}' is not an allowed value (for threshold=0, share_count must be 1).")
@@ -105,11 +338,10 @@ class BIP85(object):
         alphabetized_charset = 'sacdefghjk' # threshold above 9 is invalid
         initial_codex32_data = []
         for i in range(bool(threshold), min(threshold, n) + 1):
-            data = [k] + id + [CHARSET.find(alphabetized_charset[i])]
-            while len(data) < 6 + payload_length:
-                data.append(int.from_bytes(drng.read(1), "big") >> 3)
+            data = bytearray([k] + id + [CHARSET.find(alphabetized_charset[i])])
+            data += drng.read(payload_length).translate(_TOP_5_BITS)
             initial_codex32_data.append(data)
-        codex32_secret = ms32_recover(initial_codex32_data) if len(
+        codex32_secret = ms32_interpolate_bytes(initial_codex32_data, [16])[0] if len(
             initial_codex32_data) > 1 else initial_codex32_data[0]
         if 32 in id:
             bip32_fp = fingerprint(bytes(convertbits(codex32_secret[6:], 5, 8)))
@@ -117,43 +349,80 @@ class BIP85(object):
                 for i in range(4): # relabel shares with the BIP32 fingerprint
                     data[i + 1] = data[i + 1] if id[i] < 32 else bip32_fp[i]
         if threshold and n >= threshold:
-            strings = []
             existing_share_indexes = [16]
             for i in range(n):
                 fresh_share_index = 16
                 while fresh_share_index in existing_share_indexes:
                     fresh_share_index = int.from_bytes(drng.read(1), "big") >> 3
                 existing_share_indexes.append(fresh_share_index)
-                if CHARSET[fresh_share_index] in alphabetized_charset[:len(initial_codex32_data)+1]:
-                    share_data = initial_codex32_data[
-                        alphabetized_charset.index(CHARSET[fresh_share_index]) - 1]
-                else:
-                    share_data = ms32_interpolate(initial_codex32_data, fresh_share_index)
-                strings.append(ms32_encode(hrp, share_data))
+            fresh_share_indexes = existing_share_indexes[1:]
+            # Initial shares are reused as-is; all others are interpolated together.
+            initial_shares = {data[5]: data for data in initial_codex32_data}
+            interpolated = iter(ms32_interpolate_bytes(
+                initial_codex32_data, [i for i in fresh_share_indexes if i not in initial_shares]))
+            share_data = [initial_shares[i] if i in initial_shares else next(interpolated)
+                          for i in fresh_share_indexes]
         else:
-            strings = [ms32_encode(hrp, data) for data in initial_codex32_data]
-        assert validate_set(strings, len_must_match_k=False)
+            share_data = initial_codex32_data
+        strings = [ms32_encode(hrp, data) for data in share_data]
+        if verify:
+            assert validate_set(strings, len_must_match_k=False)
+        else:
+            assert validate_data_set(share_data, len_must_match_k=False)
 
         return {
             "identifier": strings[0][len(hrp) + 2:len(hrp) + 6],
             "codex32": strings,
         }
     
+    def entropy_to_rsa(self, entropy, bits):
+        """Generate an RSA key with the BIP85-DRNG as its only source of randomness."""
+        from Crypto.PublicKey import RSA
+        return RSA.generate(bits, randfunc=DRNG(entropy).read)
+
     def do_rolls(self, entropy: bytes, sides: int, rolls: int) -> str:
         """sides > 1, 1 < rolls > 100"""
+        return ",".join(self.iter_rolls(entropy, sides, rolls))
+
+    def iter_rolls(self, entropy: bytes, sides: int, rolls: int):
+        """Yield the rolls of do_rolls one at a time, in constant memory."""
+        return chain.from_iterable(self.iter_roll_batches(entropy, sides, rolls))
+
+    def iter_roll_batches(self, entropy: bytes, sides: int, rolls: int, batch_size=65536):
+        """Yield lists of formatted rolls, drawing up to batch_size candidates at a time."""
         max_width = len(str(sides - 1))
-        history = []
+        roll_format = f"%0{max_width}d"
         bits_per_roll = math.ceil(math.log(sides, 2))
         bytes_per_roll = math.ceil(bits_per_roll / 8)
+        excess_bits = 8 * bytes_per_roll - bits_per_roll
+        # trial_int >> excess_bits < sides exactly when trial_int < sides << excess_bits
+        limit = sides << excess_bits
+        if sides <= min(rolls, 65536):
+            format_rolls = [roll_format % i for i in range(sides)].__getitem__
+        else:
+            format_rolls = roll_format.__mod__
+        if bytes_per_roll == 1:
+            # bytes.translate drops rejected candidates and shifts the rest in one C call.
+            shift_table = bytes(i >> excess_bits for i in range(256))
+            rejected = bytes(range(limit, 256))
         drng = DRNG(entropy)
-        while len(history) < rolls:
-            trial_int = int.from_bytes(drng.read(bytes_per_roll), "big")
-            available_bits = 8 * bytes_per_roll
-            excess_bits = available_bits - bits_per_roll
-            trial_int >>= excess_bits
-            if trial_int >= sides:
-                continue
+        while rolls:
+            # Acceptance is over 1/2, so this usually finishes small requests in one draw.
+            count = min(2 * rolls + 16, batch_size)
+            block = drng.read(count * bytes_per_roll)
+            if bytes_per_roll == 1:
+                accepted = block.translate(shift_table, rejected)[:rolls]
             else:
-                history.append(f"{trial_int:0{max_width}d}")
+                candidates = self._unpack_rolls(block, bytes_per_roll)
+                accepted = [trial_int >> excess_bits for trial_int in candidates if trial_int < limit][:rolls]
+            rolls -= len(accepted)
+            yield list(map(format_rolls, accepted))
 
-        return ",".join(history)
+    def _unpack_rolls(self, block, bytes_per_roll):
+        # Big-endian unsigned candidates, as int.from_bytes(..., "big") per roll.
+        if bytes_per_roll not in _ROLL_TYPECODES:
+            return [int.from_bytes(block[i:i + bytes_per_roll], "big") for i in range(0, len(block), bytes_per_roll)]
+        candidates = array(_ROLL_TYPECODES[bytes_per_roll], block)
+        if bytes_per_roll > 1 and sys.byteorder == "little":
+            candidates.byteswap()
+        return candidates
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""asyncio versions of the app.py applications that run off the event loop.
+
+Work runs on the executor given to set_executor (the loop's default thread pool
+if None; a ProcessPoolExecutor also works). Concurrent calls with identical
+arguments share one computation. Cancelling a caller only cancels the
+computation once no other caller is waiting for it.
+"""
+
+import asyncio
+
+from bip85 import app
+
+_executor = None
+_inflight = {}
+
+
+def set_executor(executor):
+    global _executor
+    _executor = executor
+
+
+async def _run(func, *args):
+    loop = asyncio.get_running_loop()
+    key = (loop, func, args)
+    entry = _inflight.get(key)
+    if entry is None or entry[0].cancelled():
+        entry = [loop.run_in_executor(_executor, func, *args), 0]
+        _inflight[key] = entry
+        entry[0].add_done_callback(lambda _: _inflight.pop(key) if _inflight.get(key) is entry else None)
+    entry[1] += 1
+    try:
+        return await asyncio.shield(entry[0])
+    finally:
+        entry[1] -= 1
+        if not entry[1] and not entry[0].done():
+            entry[0].cancel()
+
+
+def _bip39_mnemonic_to_entropy(path, mnemonic, passphrase):
+    return app._bip85.bip39_mnemonic_to_entropy(path, mnemonic, passphrase)
+
+
+async def bip39_mnemonic_to_entropy(path, mnemonic, passphrase=''):
+    return await _run(_bip39_mnemonic_to_entropy, path, mnemonic, passphrase)
+
+
+async def bip39(xprv_string, language, words, index):
+    return await _run(app.bip39, xprv_string, language, words, index)
+
+
+async def bip93(xprv_string, hrp, threshold, n, byte_length, identifier, index, verify=True):
+    return await _run(app.bip93, xprv_string, hrp, threshold, n, byte_length, identifier, index, verify)
+
+
+async def wif(xprv_string, index):
+    return await _run(app.wif, xprv_string, index)
+
+
+async def xprv(xprv_string, index):
+    return await _run(app.xprv, xprv_string, index)
+
+
+async def hex(xprv_string, index, width):
+    return await _run(app.hex, xprv_string, index, width)
+
+
+async def base64(xprv_string, pwd_len, index):
+    return await _run(app.base64, xprv_string, pwd_len, index)
+
+
+async def base85(xprv_string, pwd_len, index):
+    return await _run(app.base85, xprv_string, pwd_len, index)
+
+
+async def dice(xprv_string, sides, rolls, index):
+    return await _run(app.dice, xprv_string, sides, rolls, index)
+
+
+async def rsa(xprv_string, bits, index, cache_dir=None):
+    return await _run(app.rsa, xprv_string, bits, index, cache_dir)
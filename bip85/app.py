@@ -20,9 +20,10 @@
 # WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-from bip85.bip93 import CHARSET
-from bip85 import BIP85
+from bip85 import BIP85, metrics
+from bip85.keycache import KeyCache
 from base64 import b64encode, b85encode
+from itertools import islice
 
 LANGUAGE_LOOKUP = {
     'english': 0,
@@ -41,20 +42,65 @@ HRP_LOOKUP = {
     'cl': 1,
 }
 
-def bip39(xprv_string, language, words, index):
+# BIP85 application numbers, used to label metrics
+_APP_NAMES = {
+    '39p': 'bip39',
+    '93p': 'bip93',
+    '2p': 'wif',
+    '32p': 'xprv',
+    '128169p': 'hex',
+    '707764p': 'base64',
+    '707785p': 'base85',
+    '89101p': 'dice',
+    '828365p': 'rsa',
+}
+
+# Shared so that parsed roots and parent nodes stay cached across calls.
+_bip85 = BIP85()
+# RSA keys take seconds to generate, so derived keys are kept.
+_rsa_cache = KeyCache()
+
+
+def _app_name(prefix):
+    # parallel workers derive from the range's parent, with an empty prefix
+    parts = prefix.split("/")
+    return _APP_NAMES.get(parts[1], 'other') if len(parts) > 1 else 'other'
+
+
+def _encode(prefix, encode, entropy, *args):
+    if metrics.sink is None:
+        return encode(entropy, *args)
+    name = _app_name(prefix)
+    metrics.count("derivations", name)
+    with metrics.span("encode", name):
+        return encode(entropy, *args)
+
+
+def _derive(xprv_string, index, prefix, encode, *args):
+    entropy = _bip85.bip32_xprv_to_entropy(f"{prefix}/{index}p", xprv_string)
+    return _encode(prefix, encode, entropy, *args)
+
+
+def _derive_range(xprv_string, start, stop, prefix, encode, *args):
+    # The parent node is derived once; each index then costs one hardened step.
+    for index, entropy in _bip85.bip32_xprv_to_entropy_range(prefix, xprv_string, start, stop):
+        yield index, _encode(prefix, encode, entropy, *args)
+
+
+def _bip39_job(language, words):
     # m/83696968'/39'/language'/words'/index'
     lang_code = LANGUAGE_LOOKUP[language]
-    bip85 = BIP85()
-    path = f"83696968p/39p/{lang_code}p/{words}p/{index}p"
+    return f"83696968p/39p/{lang_code}p/{words}p", _bip85.entropy_to_bip39, words, language
 
-    entropy = bip85.bip32_xprv_to_entropy(path, xprv_string)
-    return bip85.entropy_to_bip39(entropy, words, language)
 
+def _bip93_id(identifier):
+    from bip85.bip93 import CHARSET
+    if len(identifier) != 4:
+        raise ValueError("ERROR: Identifier must be 4 characters")
+    return [32 if CHARSET.find(char.lower()) == -1 else CHARSET.find(char.lower()) for char in identifier]
 
-def bip93(xprv_string, hrp, threshold, n, byte_length, identifier, index):
-    # m/83696968'/93'/hrp'/threshold'/n'/byte_length'/id[0]'/id[1]'/id[2]'/id[3]'/index'
-    hrp_code = HRP_LOOKUP[hrp]
-    id = [32 if CHARSET.find(char.lower()) == -1 else CHARSET.find(char.lower()) for char in identifier]
+
+def _check_bip93_index(id, index):
     default_characters = id.count(32)
     # Identifiers SHOULD be unique per seed so index can't be too high
     if index > 0 and default_characters < 2:
@@ -65,56 +111,213 @@ def bip93(xprv_string, hrp, threshold, n, byte_length, identifier, index):
         raise ValueError("ERROR: To use an index > 26, all four identifier characters must be default (i.e. not in the charset).")
     elif index > 146:
         raise ValueError("ERROR: Index must be between 0 and 146.")
-    bip85 = BIP85()
-    path = f"83696968p/93p/{hrp_code}p/{threshold}p/{n}p/{byte_length}p/{id[0]}p/{id[1]}p/{id[2]}p/{id[3]}p/{index}p"
-    entropy = bip85.bip32_xprv_to_entropy(path, xprv_string)
-    return bip85.entropy_to_bip93(entropy, hrp, threshold, n, byte_length, id)
 
 
-def wif(xprv_string, index):
+def _bip93_job(hrp, threshold, n, byte_length, identifier, verify=True):
+    # m/83696968'/93'/hrp'/threshold'/n'/byte_length'/id[0]'/id[1]'/id[2]'/id[3]'/index'
+    hrp_code = HRP_LOOKUP[hrp]
+    id = _bip93_id(identifier)
+    prefix = f"83696968p/93p/{hrp_code}p/{threshold}p/{n}p/{byte_length}p/{id[0]}p/{id[1]}p/{id[2]}p/{id[3]}p"
+    return prefix, _bip85.entropy_to_bip93, hrp, threshold, n, byte_length, id, verify
+
+
+def _wif_job(raw=False):
     # m/83696968'/2'/index'
-    bip85 = BIP85()
-    path = f"83696968p/2p/{index}p"
-    return bip85.entropy_to_wif(bip85.bip32_xprv_to_entropy(path, xprv_string))
+    return "83696968p/2p", _bip85.entropy_to_secret if raw else _bip85.entropy_to_wif
 
 
-def xprv(xprv_string, index):
+def _xprv_job():
     # m/83696968'/32'/index'
-    bip85 = BIP85()
-    path = f"83696968p/32p/{index}p"
-    return bip85.bip32_xprv_to_xprv(path, xprv_string)
+    return "83696968p/32p", _bip85.entropy_to_xprv
 
 
-def hex(xprv_string, index, width):
+def _hex(entropy, width):
+    return entropy[:width].hex()
+
+
+def _hex_job(width):
     # m/83696968'/128169'/width'/index'
-    bip85 = BIP85()
-    path = f"83696968p/128169p/{width}p/{index}p"
-    return bip85.bip32_xprv_to_hex(path, width, xprv_string)
+    return f"83696968p/128169p/{width}p", _hex, width
 
 
-def base64(xprv_string, pwd_len, index):
-    # m/83696968'/707764'/pwd_len'/index'
-    bip85 = BIP85()
-    path = f"83696968p/707764p/{pwd_len}p/{index}p"
-    entropy = bip85.bip32_xprv_to_entropy(path, xprv_string)
+def _base64(entropy, pwd_len):
     return b64encode(entropy)[:pwd_len]
-    
 
-def base85(xprv_string, pwd_len, index):
-    # m/83696968'/707785'/pwd_len'/index'
-    bip85 = BIP85()
-    path = f"83696968p/707785p/{pwd_len}p/{index}p"
-    entropy = bip85.bip32_xprv_to_entropy(path, xprv_string)
+
+def _base64_job(pwd_len):
+    # m/83696968'/707764'/pwd_len'/index'
+    return f"83696968p/707764p/{pwd_len}p", _base64, pwd_len
+
+
+def _base85(entropy, pwd_len):
     return b85encode(entropy)[:pwd_len]
 
 
-def dice(xprv_string, sides, rolls, index):
+def _base85_job(pwd_len):
+    # m/83696968'/707785'/pwd_len'/index'
+    return f"83696968p/707785p/{pwd_len}p", _base85, pwd_len
+
+
+def _dice_job(sides, rolls):
     # m/83696968'/89101'/sides'/rolls'/index'
     if not 1 < sides < 2 ** 32:
         raise ValueError("ERROR: Sides must be: 2 <= sides <= 2^32 - 1")
     elif not 0 < rolls < 2 ** 32:
         raise ValueError("ERROR: Rolls must be: 1 <= rolls <= 2^32 - 1")
-    path = f"83696968p/89101p/{sides}p/{rolls}p/{index}p"
-    bip85 = BIP85()
-    entropy = bip85.bip32_xprv_to_entropy(path, xprv_string)
-    return bip85.do_rolls(entropy, sides, rolls)
+    return f"83696968p/89101p/{sides}p/{rolls}p", _bip85.do_rolls, sides, rolls
+
+
+def _rsa(entropy, bits, cache_dir=None):
+    def generate():
+        return _bip85.entropy_to_rsa(entropy, bits).export_key('PEM')
+    return _rsa_cache.get_or_derive(entropy, f"rsa/{bits}", generate, cache_dir)
+
+
+def _rsa_job(bits, cache_dir=None):
+    # m/83696968'/828365'/key_bits'/key_index'
+    if bits < 1024:
+        raise ValueError("ERROR: RSA key bits must be at least 1024")
+    return f"83696968p/828365p/{bits}p", _rsa, bits, cache_dir
+
+
+def set_rsa_cache(cache):
+    """Replace the KeyCache used for RSA keys, e.g. KeyCache(maxsize=0) to disable it; returns the old one."""
+    global _rsa_cache
+    previous, _rsa_cache = _rsa_cache, cache
+    return previous
+
+
+_JOBS = {
+    'bip39': _bip39_job,
+    'bip93': _bip93_job,
+    'wif': _wif_job,
+    'xprv': _xprv_job,
+    'hex': _hex_job,
+    'base64': _base64_job,
+    'base85': _base85_job,
+    'dice': _dice_job,
+    'rsa': _rsa_job,
+}
+
+
+def _range_job(name, start, stop, **params):
+    if name == 'bip93' and stop > start:
+        _check_bip93_index(_bip93_id(params['identifier']), stop - 1)
+    return _JOBS[name](**params)
+
+
+def bip39(xprv_string, language, words, index):
+    return _derive(xprv_string, index, *_bip39_job(language, words))
+
+
+def bip39_range(xprv_string, language, words, start, stop):
+    return _derive_range(xprv_string, start, stop, *_bip39_job(language, words))
+
+
+def bip93(xprv_string, hrp, threshold, n, byte_length, identifier, index, verify=True):
+    _check_bip93_index(_bip93_id(identifier), index)
+    return _derive(xprv_string, index, *_bip93_job(hrp, threshold, n, byte_length, identifier, verify))
+
+
+def bip93_range(xprv_string, hrp, threshold, n, byte_length, identifier, start, stop, verify=True):
+    job = _range_job('bip93', start, stop, hrp=hrp, threshold=threshold, n=n, byte_length=byte_length,
+                     identifier=identifier, verify=verify)
+    return _derive_range(xprv_string, start, stop, *job)
+
+
+def wif(xprv_string, index):
+    return _derive(xprv_string, index, *_wif_job())
+
+
+def wif_range(xprv_string, start, stop, raw=False):
+    """raw=True yields the 32-byte private keys instead of their WIFs."""
+    return _derive_range(xprv_string, start, stop, *_wif_job(raw))
+
+
+def write_wif_range(xprv_string, start, stop, out, raw=False, chunk_size=4096):
+    """Write the WIFs of start <= index < stop to binary file out, one per line.
+
+    raw=True writes the 32-byte private keys packed back to back instead; read
+    them back with iter(functools.partial(f.read, 32), b'').
+    """
+    keys = (key for _, key in wif_range(xprv_string, start, stop, raw))
+    chunk = list(islice(keys, chunk_size))
+    while chunk:
+        out.write(b''.join(chunk) if raw else "".join(key + "\n" for key in chunk).encode())
+        chunk = list(islice(keys, chunk_size))
+
+
+def xprv(xprv_string, index):
+    return _derive(xprv_string, index, *_xprv_job())
+
+
+def xprv_range(xprv_string, start, stop):
+    return _derive_range(xprv_string, start, stop, *_xprv_job())
+
+
+def hex(xprv_string, index, width):
+    return _derive(xprv_string, index, *_hex_job(width))
+
+
+def hex_range(xprv_string, width, start, stop):
+    return _derive_range(xprv_string, start, stop, *_hex_job(width))
+
+
+def base64(xprv_string, pwd_len, index):
+    return _derive(xprv_string, index, *_base64_job(pwd_len))
+
+
+def base64_range(xprv_string, pwd_len, start, stop):
+    return _derive_range(xprv_string, start, stop, *_base64_job(pwd_len))
+
+
+def base85(xprv_string, pwd_len, index):
+    return _derive(xprv_string, index, *_base85_job(pwd_len))
+
+
+def base85_range(xprv_string, pwd_len, start, stop):
+    return _derive_range(xprv_string, start, stop, *_base85_job(pwd_len))
+
+
+def dice(xprv_string, sides, rolls, index):
+    return _derive(xprv_string, index, *_dice_job(sides, rolls))
+
+
+def iter_dice(xprv_string, sides, rolls, index):
+    prefix, _, *args = _dice_job(sides, rolls)
+    return _derive(xprv_string, index, prefix, _bip85.iter_rolls, *args)
+
+
+def dice_range(xprv_string, sides, rolls, start, stop):
+    return _derive_range(xprv_string, start, stop, *_dice_job(sides, rolls))
+
+
+def rsa(xprv_string, bits, index, cache_dir=None):
+    """PKCS#1 PEM bytes of the RSA key at index; cache_dir keeps keys encrypted on disk."""
+    return _derive(xprv_string, index, *_rsa_job(bits, cache_dir))
+
+
+def rsa_range(xprv_string, bits, start, stop, cache_dir=None):
+    return _derive_range(xprv_string, start, stop, *_rsa_job(bits, cache_dir))
+
+
+APPLICATIONS = {
+    'bip39': bip39,
+    'bip93': bip93,
+    'wif': wif,
+    'xprv': xprv,
+    'hex': hex,
+    'base64': base64,
+    'base85': base85,
+    'dice': dice,
+    'rsa': rsa,
+}
+
+
+def run_job(xprv_string, job):
+    """Derive a job such as {'app': 'hex', 'index': 0, 'width': 32}, returning a JSON-ready result."""
+    params = dict(job)
+    derive = APPLICATIONS[params.pop('app')]
+    params.pop('id', None)
+    result = derive(xprv_string, **params)
+    return result.decode() if isinstance(result, bytes) else result
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from itertools import cycle  # noqa: E402
+
+from bip85 import BIP85, app  # noqa: E402
+
+XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
+MNEMONIC = 'install scatter logic circle pencil average fall shoe quantum disease suspect usage'
+
+JOBS = {
+    'bip39': {'app': 'bip39', 'language': 'english', 'words': 24},
+    'bip93': {'app': 'bip93', 'hrp': 'ms', 'threshold': 2, 'n': 3, 'byte_length': 16, 'identifier': '????'},
+    'wif': {'app': 'wif'},
+    'xprv': {'app': 'xprv'},
+    'hex': {'app': 'hex', 'width': 64},
+    'base64': {'app': 'base64', 'pwd_len': 21},
+    'base85': {'app': 'base85', 'pwd_len': 12},
+    'dice': {'app': 'dice', 'sides': 6, 'rolls': 10},
+}
+# codex32 indexes stop at 146
+RANGE_SIZE = {'bip93': 147}
+
+
+def _per_second(benchmark, count):
+    # Record the derived throughput; pytest-benchmark's OPS counts whole calls.
+    # stats is None under --benchmark-disable.
+    if benchmark.stats is not None:
+        benchmark.extra_info['per_second'] = count / benchmark.stats.stats.mean
+
+
+@pytest.mark.benchmark(group="app-single")
+@pytest.mark.parametrize("name", JOBS)
+def test_app(benchmark, name):
+    index = cycle(range(RANGE_SIZE.get(name, 1000)))
+    benchmark(lambda: app.run_job(XPRV, dict(JOBS[name], index=next(index))))
+
+
+@pytest.mark.benchmark(group="app-range")
+@pytest.mark.parametrize("name", JOBS)
+def test_app_range(benchmark, name):
+    params = {k: v for k, v in JOBS[name].items() if k != 'app'}
+    stop = RANGE_SIZE.get(name, 1000)
+    job = app._range_job(name, 0, stop, **params)
+    benchmark(lambda: list(app._derive_range(XPRV, 0, stop, *job)))
+    _per_second(benchmark, stop)
+
+
+@pytest.mark.benchmark(group="bip39-seed")
+@pytest.mark.parametrize("seed_cache_size", [0, 1], ids=["pbkdf2", "cached"])
+def test_bip39_seed(benchmark, seed_cache_size):
+    bip85 = BIP85(seed_cache_size=seed_cache_size)
+    benchmark(bip85.bip39_mnemonic_to_entropy, "m/83696968'/0'/0'", MNEMONIC)
+
+
+@pytest.mark.benchmark(group="codex32-generate")
+@pytest.mark.parametrize("byte_length", [16, 64])
+@pytest.mark.parametrize("threshold, n", [(2, 3), (3, 5), (5, 9), (7, 20), (9, 31)])
+def test_codex32(benchmark, threshold, n, byte_length):
+    index = cycle(range(RANGE_SIZE['bip93']))
+    benchmark(lambda: app.bip93(XPRV, 'ms', threshold, n, byte_length, '????', next(index)))
+
+
+@pytest.mark.benchmark(group="dice")
+@pytest.mark.parametrize("rolls", [10 ** e for e in range(3, 8)])
+def test_dice(benchmark, rolls):
+    benchmark.pedantic(app.dice, args=(XPRV, 6, rolls, 0), rounds=3, warmup_rounds=0)
+    _per_second(benchmark, rolls)
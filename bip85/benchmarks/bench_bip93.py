@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from bip85 import bip93  # noqa: E402
+
+
+def _bech32_mul_loop(a, b):
+    res = 0
+    for i in range(5):
+        res ^= a if ((b >> i) & 1) else 0
+        a *= 2
+        a ^= 41 if (32 <= a) else 0
+    return res
+
+
+def _ms32_interpolate_loop(l, x):
+    # bip93.ms32_interpolate before the multiplication table
+    ids = [s[5] for s in l]
+    n = 1
+    c = []
+    for i in ids:
+        n = _bech32_mul_loop(n, i ^ x)
+        m = 1
+        for j in ids:
+            m = _bech32_mul_loop(m, (x if i == j else i) ^ j)
+        c.append(m)
+    w = [_bech32_mul_loop(n, bip93.bech32_inv[i]) for i in c]
+    res = []
+    for i in range(len(l[0])):
+        n = 0
+        for j in range(len(l)):
+            n ^= _bech32_mul_loop(w[j], l[j][i])
+        res.append(n)
+    return res
+
+
+def _ms32_polymod_loop(values):
+    residue = 0x23181B3
+    for v in values:
+        b = residue >> 60
+        residue = (residue & 0x0FFFFFFFFFFFFFFF) << 5 ^ v
+        for i in range(5):
+            residue ^= bip93.MS32_GEN[i] if ((b >> i) & 1) else 0
+    return residue
+
+
+def _shares(k, byte_length):
+    payload = bip93.convertbits(bytes(range(byte_length)), 8, 5)
+    return [[k, 0, 1, 2, 3, bip93.CHARSET.find(c)] + [(v + i) % 32 for v in payload]
+            for i, c in enumerate("acdefghjk"[:k])]
+
+
+@pytest.mark.benchmark(group="gf32-mul")
+@pytest.mark.parametrize("mul", [_bech32_mul_loop, bip93.bech32_mul], ids=["loop", "table"])
+def test_bech32_mul(benchmark, mul):
+    pairs = [(a, b) for a in range(32) for b in range(32)]
+    benchmark(lambda: [mul(a, b) for a, b in pairs])
+
+
+@pytest.mark.benchmark(group="ms32-interpolate")
+@pytest.mark.parametrize("interpolate", [_ms32_interpolate_loop, bip93.ms32_interpolate], ids=["loop", "single"])
+@pytest.mark.parametrize("k, byte_length", [(2, 16), (9, 64)])
+def test_ms32_interpolate(benchmark, interpolate, k, byte_length):
+    shares = _shares(k, byte_length)
+    result = benchmark(lambda: [interpolate(shares, x) for x in range(32)])
+    assert result == [_ms32_interpolate_loop(shares, x) for x in range(32)]
+
+
+@pytest.mark.benchmark(group="ms32-interpolate")
+@pytest.mark.parametrize("k, byte_length", [(2, 16), (9, 64)])
+def test_ms32_interpolate_many(benchmark, k, byte_length):
+    shares = _shares(k, byte_length)
+    result = benchmark(bip93.ms32_interpolate_many, shares, range(32))
+    assert result == [_ms32_interpolate_loop(shares, x) for x in range(32)]
+
+
+@pytest.mark.benchmark(group="ms32-polymod")
+@pytest.mark.parametrize("polymod", [_ms32_polymod_loop, bip93.ms32_polymod], ids=["loop", "table"])
+def test_ms32_polymod(benchmark, polymod):
+    data = _shares(2, 16)[0]
+    assert benchmark(polymod, data + [0] * 13) == _ms32_polymod_loop(data + [0] * 13)
+
+
+@pytest.mark.benchmark(group="ms32-checksum")
+@pytest.mark.parametrize("byte_length", [16, 64])
+def test_ms32_encode_decode(benchmark, byte_length):
+    data = _shares(2, byte_length)[0]
+    benchmark(lambda: bip93.ms32_decode(bip93.ms32_encode("ms", data)))
+
+
+def _share_sets(count, k, byte_length):
+    # count sets of k shares (indexes a, c, d...), each with its own identifier
+    sets = []
+    for i in range(count):
+        ident = [(i >> shift) & 31 for shift in (15, 10, 5, 0)]
+        header = [bip93.CHARSET.find(str(k))] + ident
+        shares = [header + s[5:6] + [(v + i) % 32 for v in s[6:]] for s in _shares(k, byte_length)]
+        sets.append([bip93.ms32_encode("ms", data) for data in shares])
+    return sets
+
+
+@pytest.mark.benchmark(group="ms32-layout")
+@pytest.mark.parametrize("layout", ["list", "bytes"])
+def test_ms32_layout(benchmark, layout):
+    # decode a 2-of-n set and interpolate its secret, as lists of ints or as bytes
+    strings = _share_sets(1, 2, 32)[0]
+    if layout == "list":
+        def run():
+            return bip93.ms32_interpolate([bip93.ms32_decode(s)[4] for s in strings], 16)
+    else:
+        def run():
+            return list(bip93.ms32_interpolate_bytes([bip93.ms32_decode_bytes(s)[4] for s in strings], [16])[0])
+    assert benchmark(run) == _ms32_interpolate_loop([bip93.ms32_decode(s)[4] for s in strings], 16)
+
+
+@pytest.mark.benchmark(group="codex32-audit")
+@pytest.mark.parametrize("batch", [False, True], ids=["per-set", "batch"])
+def test_recover_master_seeds(benchmark, batch):
+    sets = _share_sets(1000, 3, 16)
+    if batch:
+        strings = [s for shares in sets for s in shares]
+        groups, invalid = benchmark(bip93.recover_master_seeds, strings)
+        assert len(groups) == 1000 and not invalid and not any(g['error'] for g in groups)
+    else:
+        seeds = benchmark(lambda: [bip93.recover_master_seed(shares) for shares in sets])
+        assert all(seeds)
+
+
+@pytest.mark.benchmark(group="lagrange-weights")
+@pytest.mark.parametrize("maxsize", [0, 1024], ids=["uncached", "cached"])
+@pytest.mark.parametrize("k", [2, 3, 9])
+def test_lagrange_weights(benchmark, maxsize, k):
+    ids = [bip93.CHARSET.find(c) for c in "acdefghjk"[:k]]
+    bip93.set_lagrange_cache_size(maxsize)
+    try:
+        benchmark(lambda: [bip93.bech32_lagrange(ids, x) for x in range(32)])
+    finally:
+        bip93.set_lagrange_cache_size(1024)
+
+
+def _fingerprint_bip32node(seed):
+    # bip93.fingerprint before the direct path
+    from pycoin.key.BIP32Node import BIP32Node
+    from pycoin.ecdsa.secp256k1 import secp256k1_generator
+    BIP32Node._generator = secp256k1_generator
+    node = BIP32Node.from_master_secret(seed)
+    return bip93.convertbits(node.fingerprint(), 8, 5)[:4]
+
+
+@pytest.mark.benchmark(group="fingerprint")
+@pytest.mark.parametrize("cached", [False, True], ids=["uncached", "cached"])
+def test_fingerprint(benchmark, cached):
+    seeds = [bytes([i]) * 16 for i in range(64)]
+    if not cached:
+        bip93._fingerprint_cache.clear()
+        result = benchmark.pedantic(lambda: [bip93.fingerprint(s) for s in seeds],
+                                    setup=bip93._fingerprint_cache.clear, rounds=10)
+    else:
+        result = benchmark(lambda: [bip93.fingerprint(s) for s in seeds])
+    assert result == [_fingerprint_bip32node(s) for s in seeds]
+
+
+@pytest.mark.benchmark(group="fingerprint")
+def test_fingerprint_bip32node(benchmark):
+    benchmark(lambda: [_fingerprint_bip32node(bytes([i]) * 16) for i in range(64)])
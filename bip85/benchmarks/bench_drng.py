@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from Crypto.Hash import SHAKE256  # noqa: E402
+from bip85 import BIP85DRNG  # noqa: E402
+
+ENTROPY = bytes(range(64))
+
+
+@pytest.mark.benchmark(group="drng-small-reads")
+@pytest.mark.parametrize("size", [1, 2, 4])
+@pytest.mark.parametrize("new", [SHAKE256.new, BIP85DRNG.new], ids=["shake256", "buffered"])
+def test_small_reads(benchmark, new, size):
+    def read():
+        drng = new(ENTROPY)
+        for _ in range(10000):
+            drng.read(size)
+    benchmark(read)
+
+
+@pytest.mark.benchmark(group="drng-throughput")
+@pytest.mark.parametrize("chunk", [64, 4096, 1 << 20])
+def test_throughput(benchmark, chunk):
+    size = 1 << 24
+
+    def read():
+        drng = BIP85DRNG.new(ENTROPY)
+        for _ in range(size // chunk):
+            drng.read(chunk)
+    benchmark.pedantic(read, rounds=3)
+    if benchmark.stats is not None:  # None under --benchmark-disable
+        benchmark.extra_info['MB_per_second'] = size / benchmark.stats.stats.mean / 1e6
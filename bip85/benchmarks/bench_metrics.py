@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from bip85 import app, metrics  # noqa: E402
+
+XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
+
+
+def _no_span():
+    for _ in range(10000):
+        pass
+
+
+def _guard():
+    # what the per-index hot path pays while disabled
+    for _ in range(10000):
+        if metrics.sink is not None:
+            pass
+
+
+def _disabled_span():
+    for _ in range(10000):
+        with metrics.span("encode"):
+            pass
+
+
+@pytest.mark.benchmark(group="metrics-span")
+@pytest.mark.parametrize("loop", [_no_span, _guard, _disabled_span], ids=["none", "guard", "null-span"])
+def test_span_overhead(benchmark, loop):
+    assert not metrics.enabled()
+    benchmark(loop)
+
+
+@pytest.mark.benchmark(group="metrics-derivation")
+@pytest.mark.parametrize("sink", [None, metrics.HistogramSink], ids=["disabled", "histogram"])
+def test_derivation_overhead(benchmark, sink):
+    previous = metrics.set_sink(sink and sink())
+    try:
+        benchmark(lambda: list(app.hex_range(XPRV, 32, 0, 1000)))
+    finally:
+        metrics.set_sink(previous)
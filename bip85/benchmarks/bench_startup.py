@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+def import_times(statement):
+    """Return {module: cumulative microseconds} from python -X importtime."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                         capture_output=True, text=True, check=True)
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.benchmark(group="startup")
+@pytest.mark.parametrize("statement", [
+    "import bip85",
+    "import bip85.cli",
+    "import bip85.cli; bip85.cli.BIP85().bip32_xprv_to_entropy(\"m/0'\", "
+    "'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb')",
+], ids=["package", "cli", "first-derivation"])
+def test_import_time(benchmark, statement):
+    # Wall time includes interpreter startup; extra_info has the importtime breakdown.
+    benchmark.pedantic(subprocess.run, args=([sys.executable, '-c', statement],),
+                       kwargs={'check': True}, rounds=5)
+    times = import_times(statement)
+    benchmark.extra_info.update({name: times[name] for name in (
+        'bip85', 'bip85.cli', 'mnemonic', 'pycoin', 'Crypto', 'base58') if name in times})
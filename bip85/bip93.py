@@ -3,8 +3,14 @@
 # License: BSD-3-Clause
 """Complete BIP-93 Codex32 implementation"""
 
-from pycoin.key.BIP32Node import BIP32Node
-from pycoin.ecdsa.secp256k1 import secp256k1_generator
+import functools
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from itertools import chain, repeat
+
 CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
 MS32_CONST = 0x10CE0795C2FD1E62A
 MS32_LONG_CONST = 0x43381E570BF4798AB26
@@ -14,23 +20,58 @@ bech32_inv = [
 ]
 
 
-def ms32_polymod(values):
-    GEN = [
-        0x19DC500CE73FDE210,
-        0x1BFAE00DEF77FE529,
-        0x1FBD920FFFE7BEE52,
-        0x1739640BDEEE3FDAD,
-        0x07729A039CFC75F5A,
-    ]
-    residue = 0x23181B3
-    for v in values:
-        b = residue >> 60
-        residue = (residue & 0x0FFFFFFFFFFFFFFF) << 5 ^ v
+MS32_GEN = [
+    0x19DC500CE73FDE210,
+    0x1BFAE00DEF77FE529,
+    0x1FBD920FFFE7BEE52,
+    0x1739640BDEEE3FDAD,
+    0x07729A039CFC75F5A,
+]
+MS32_LONG_GEN = [
+    0x3D59D273535EA62D897,
+    0x7A9BECB6361C6C51507,
+    0x543F9B7E6C38D8A2A0E,
+    0x0C577EAECCF1990D13C,
+    0x1887F74F8DC71B10651,
+]
+
+
+def _residue_tables(gen, shift):
+    """Tables of the generator terms folded in for one and for two symbols."""
+    table = [0] * 32
+    for b in range(32):
         for i in range(5):
-            residue ^= GEN[i] if ((b >> i) & 1) else 0
+            table[b] ^= gen[i] if ((b >> i) & 1) else 0
+    mask = (1 << shift) - 1
+    pair_table = [((table[b >> 5] & mask) << 5) ^ table[(b & 31) ^ (table[b >> 5] >> shift)]
+                  for b in range(1024)]
+    return table, pair_table
+
+
+MS32_TABLES = _residue_tables(MS32_GEN, 60)
+MS32_LONG_TABLES = _residue_tables(MS32_LONG_GEN, 70)
+
+
+def _polymod(values, shift, tables, zeros=0):
+    # Two symbols per step through the pair table, plus one leading step for odd
+    # lengths. zeros appends that many 0 symbols without copying values.
+    table, pair_table = tables
+    residue = 0x23181B3
+    it = chain(values, repeat(0, zeros)) if zeros else iter(values)
+    if (len(values) + zeros) % 2:
+        residue = ((residue & ((1 << shift) - 1)) << 5 ^ next(it)) ^ table[residue >> shift]
+    pair_shift = shift - 5
+    mask = (1 << pair_shift) - 1
+    for hi, lo in zip(it, it):
+        residue = ((residue & mask) << 10 ^ (hi << 5) ^ lo) ^ pair_table[residue >> pair_shift]
     return residue
 
 
+def ms32_polymod(values, zeros=0):
+    """values is any sequence of symbols: a list, or bytes with one symbol per byte."""
+    return _polymod(values, 60, MS32_TABLES, zeros)
+
+
 def ms32_verify_checksum(data):
     if len(data) >= 96:  # See Long codex32 Strings
         return ms32_verify_long_checksum(data)
@@ -42,26 +83,12 @@ def ms32_verify_checksum(data):
 def ms32_create_checksum(data):
     if len(data) > 80:  # See Long codex32 Strings
         return ms32_create_long_checksum(data)
-    values = data
-    polymod = ms32_polymod(values + [0] * 13) ^ MS32_CONST
+    polymod = ms32_polymod(data, 13) ^ MS32_CONST
     return [(polymod >> 5 * (12 - i)) & 31 for i in range(13)]
 
 
-def ms32_long_polymod(values):
-    GEN = [
-        0x3D59D273535EA62D897,
-        0x7A9BECB6361C6C51507,
-        0x543F9B7E6C38D8A2A0E,
-        0x0C577EAECCF1990D13C,
-        0x1887F74F8DC71B10651,
-    ]
-    residue = 0x23181B3
-    for v in values:
-        b = residue >> 70
-        residue = (residue & 0x3FFFFFFFFFFFFFFFFF) << 5 ^ v
-        for i in range(5):
-            residue ^= GEN[i] if ((b >> i) & 1) else 0
-    return residue
+def ms32_long_polymod(values, zeros=0):
+    return _polymod(values, 70, MS32_LONG_TABLES, zeros)
 
 
 def ms32_verify_long_checksum(data):
@@ -69,12 +96,11 @@ def ms32_verify_long_checksum(data):
 
 
 def ms32_create_long_checksum(data):
-    values = data
-    polymod = ms32_long_polymod(values + [0] * 15) ^ MS32_LONG_CONST
+    polymod = ms32_long_polymod(data, 15) ^ MS32_LONG_CONST
     return [(polymod >> 5 * (14 - i)) & 31 for i in range(15)]
 
 
-def bech32_mul(a, b):
+def _bech32_mul_bits(a, b):
     res = 0
     for i in range(5):
         res ^= a if ((b >> i) & 1) else 0
@@ -83,28 +109,75 @@ def bech32_mul(a, b):
     return res
 
 
+# bech32_mul_table[a][b] == a * b in GF(32), built once at import. Rows cover
+# b < 64 since only the low 5 bits of b count and placeholder symbols are 32.
+bech32_mul_table = [[_bech32_mul_bits(a, b) for b in range(64)] for a in range(32)]
+
+
+def bech32_mul(a, b):
+    return bech32_mul_table[a][b]
+
+
 # noinspection PyPep8
-def bech32_lagrange(l, x):
+def _bech32_lagrange(ids, x):
+    mul = bech32_mul_table
     n = 1
     c = []
-    for i in l:
-        n = bech32_mul(n, i ^ x)
+    for i in ids:
+        n = mul[n][i ^ x]
         m = 1
-        for j in l:
-            m = bech32_mul(m, (x if i == j else i) ^ j)
+        for j in ids:
+            m = mul[m][(x if i == j else i) ^ j]
         c.append(m)
-    return [bech32_mul(n, bech32_inv[i]) for i in c]
+    return tuple(mul[n][bech32_inv[i]] for i in c)
+
+
+# Weights depend only on the share indexes and x, which repeat across share sets.
+_lagrange_weights = functools.lru_cache(maxsize=1024)(_bech32_lagrange)
+
+
+def bech32_lagrange(l, x):
+    return list(_lagrange_weights(tuple(l), x))
+
+
+def lagrange_cache_info():
+    """Hits, misses, maxsize and currsize of the Lagrange weight cache."""
+    return _lagrange_weights.cache_info()
+
+
+def set_lagrange_cache_size(maxsize):
+    """Resize the Lagrange weight cache, dropping its entries (0 disables, None is unbounded)."""
+    global _lagrange_weights
+    _lagrange_weights = functools.lru_cache(maxsize=maxsize)(_bech32_lagrange)
+
+
+# bech32_mul_translate[w] maps each symbol byte to its product with w for bytes.translate.
+bech32_mul_translate = [bytes(row + [0] * (256 - len(row))) for row in bech32_mul_table]
 
 
 def ms32_interpolate(l, x):
-    w = bech32_lagrange([s[5] for s in l], x)
-    res = []
-    for i in range(len(l[0])):
-        n = 0
-        for j in range(len(l)):
-            n ^= bech32_mul(w[j], l[j][i])
-        res.append(n)
-    return res
+    return ms32_interpolate_many(l, [x])[0]
+
+
+def ms32_interpolate_many(l, xs):
+    """Interpolate shares l at every index in xs, in one pass over the share data."""
+    return [list(data) for data in ms32_interpolate_bytes(l, xs)]
+
+
+def ms32_interpolate_bytes(l, xs):
+    """ms32_interpolate_many for shares held as bytes, one symbol per byte; returns bytes."""
+    ids = tuple(s[5] for s in l)
+    shares = [s if isinstance(s, (bytes, bytearray)) else bytes(s) for s in l]
+    return [_ms32_combine(shares, _lagrange_weights(ids, x)) for x in xs]
+
+
+def _ms32_combine(shares, weights):
+    # Symbols are one byte each and addition is XOR, so a whole column sweep
+    # is a byte-wise table gather followed by one big-int XOR per share.
+    n = 0
+    for wj, share in zip(weights, shares):
+        n ^= int.from_bytes(share.translate(bech32_mul_translate[wj]), "big")
+    return n.to_bytes(len(shares[0]), "big")
 
 
 def ms32_recover(l):
@@ -133,24 +206,37 @@ def ms32_recover(l):
 
 
 def ms32_encode(hrp, data):
-    """Compute an MS32 string given HRP and data."""
-    combined = data + ms32_create_checksum(data)
-    return hrp + "1" + "".join([CHARSET[d] for d in combined])
+    """Compute an MS32 string given HRP and data (a list, or bytes with one symbol per byte)."""
+    combined = bytes(data) + bytes(ms32_create_checksum(data))
+    return hrp + "1" + combined.translate(_CHARSET_FWD).decode()
+
+
+# _CHARSET_REV maps each ASCII byte to its symbol value, or 0xFF if not in CHARSET;
+# _CHARSET_FWD maps symbol values back to characters, and anything else to 0xFF.
+_CHARSET_REV = bytes(CHARSET.find(chr(b)) if chr(b) in CHARSET else 0xFF for b in range(256))
+_CHARSET_FWD = CHARSET.encode() + b'\xff' * (256 - len(CHARSET))
 
 
 def ms32_decode(bech):
     """Validate a ms32 string, and determine HRP and data."""
-    if ((any(ord(x) < 33 or ord(x) > 126 for x in bech)) or
+    hrp, k, ident, share_index, data = ms32_decode_bytes(bech)
+    return hrp, k, ident, share_index, None if data is None else list(data)
+
+
+def ms32_decode_bytes(bech):
+    """ms32_decode returning the data as bytes, one symbol per byte."""
+    if ((not bech or min(bech) < '!' or max(bech) > '~') or
             (bech.lower() != bech and bech.upper() != bech)):
         return None, None, None, None, None
     bech = bech.lower()
     pos = bech.rfind('1')
     if pos < 1 or pos + 46 > len(bech) or len(bech) > 127:
         return None, None, None, None, None
-    if not all(x in CHARSET for x in bech[pos + 1:]):
+    symbols = bech[pos + 1:].encode().translate(_CHARSET_REV)
+    if 0xFF in symbols:
         return None, None, None, None, None
     hrp = bech[:pos]
-    data = [CHARSET.find(x) for x in bech[pos+1:]]
+    data = symbols
     k = bech[pos + 1]
     if not k.isdigit():
         return None, None, None, None, None
@@ -202,7 +288,7 @@ def convertbits(data, frombits, tobits, pad=True, pad_val='xor', verify=False):
 
 def decode_secret(hrp, codex_str):
     """Decode a codex32 secret to bytes."""
-    hrpgot, _, _, _, data = ms32_decode(codex_str)
+    hrpgot, _, _, _, data = ms32_decode_bytes(codex_str)
     if hrpgot != hrp:
         return None
     decoded = convertbits(data[6:], 5, 8, False)
@@ -213,7 +299,13 @@ def decode_secret(hrp, codex_str):
 
 def validate_set(string_list, len_must_match_k=True):
     """Validate set has unique indices & uniform: k, ident, length."""
-    decoded = [ms32_decode(s) for s in string_list]
+    data_list = _validate_set_bytes(string_list, len_must_match_k)
+    return data_list and [list(data) for data in data_list]
+
+
+def _validate_set_bytes(string_list, len_must_match_k=True):
+    # validate_set, leaving each share's data as bytes
+    decoded = [ms32_decode_bytes(s) for s in string_list]
     headers = {tuple(d[:3]) for d in decoded}
     indices = {d[3] for d in decoded}
     lengths = {len(s) for s in string_list}
@@ -229,12 +321,90 @@ def validate_set(string_list, len_must_match_k=True):
     return [data[4] for data in decoded]
 
 
+def validate_data_set(data_list, len_must_match_k=True):
+    """Check ms32 data lists (no checksums) structurally, without encoding or decoding."""
+    if not data_list or any(v < 0 or v > 31 for data in data_list for v in data):
+        return False
+    headers = {tuple(data[:5]) for data in data_list}
+    indices = {data[5] for data in data_list}
+    lengths = {len(data) for data in data_list}
+    if len(headers) > 1 or len(lengths) > 1 or len(indices) < len(data_list):
+        return False
+    k = CHARSET[data_list[0][0]]
+    if not k.isdigit() or (k == "0" and indices != {CHARSET.find("s")}):
+        return False
+    if len_must_match_k and int(k) != len(data_list):
+        return False
+    return 16 <= (len(data_list[0]) - 6) * 5 // 8 <= 64
+
+
 def recover_master_seed(share_list):
     """Derive master seed from a valid set of codex32 shares."""
-    ms32_share_list = validate_set(share_list)
+    ms32_share_list = _validate_set_bytes(share_list)
     if not ms32_share_list:
         return None
-    return bytes(convertbits(ms32_recover(ms32_share_list)[6:], 5, 8, False))
+    return bytes(convertbits(ms32_interpolate_bytes(ms32_share_list, [16])[0][6:], 5, 8, False))
+
+
+# Error codes reported by recover_master_seeds
+ERR_DECODE = "decode"                # invalid characters, case, length or checksum
+ERR_LENGTH = "length"                # shares of one set differ in length
+ERR_DUPLICATE = "duplicate_index"    # two different shares with the same index
+ERR_THRESHOLD = "threshold"          # fewer than k shares
+ERR_INCONSISTENT = "inconsistent"    # shares beyond the first k disagree with them
+ERR_PAYLOAD = "payload"              # recovered secret has bad padding or size
+
+
+def recover_master_seeds(string_list):
+    """Recover the master seed of every share set mixed together in string_list.
+
+    Strings are decoded once and grouped by (hrp, k, identifier). Each group is
+    recovered from its first k distinct shares and any further shares are checked
+    against them; Lagrange weights come from the shared weight cache. Returns
+    (groups, invalid): groups is a list of dicts with keys hrp, k, identifier,
+    positions (indexes into string_list), seed and error (None or an ERR_* code,
+    with seed None); invalid lists the positions of undecodable strings.
+    """
+    groups = {}
+    invalid = []
+    for position, string in enumerate(string_list):
+        hrp, k, ident, _, data = ms32_decode_bytes(string.strip())
+        if data is None:
+            invalid.append(position)
+            continue
+        groups.setdefault((hrp, k, ident), []).append((position, data))
+    results = []
+    for (hrp, k, ident), members in groups.items():
+        seed, error = _recover_group(int(k), [data for _, data in members])
+        results.append({"hrp": hrp, "k": int(k), "identifier": ident,
+                        "positions": [position for position, _ in members],
+                        "seed": seed, "error": error})
+    return results, invalid
+
+
+def _recover_group(k, shares):
+    if len({len(data) for data in shares}) > 1:
+        return None, ERR_LENGTH
+    by_index = {}
+    for data in shares:
+        if by_index.setdefault(data[5], data) != data:
+            return None, ERR_DUPLICATE
+    distinct = list(by_index.values())
+    if k == 0:
+        secret = distinct[0]
+    else:
+        if len(distinct) < k:
+            return None, ERR_THRESHOLD
+        chosen = distinct[:k]
+        ids = tuple(data[5] for data in chosen)
+        for extra in distinct[k:]:
+            if _ms32_combine(chosen, _lagrange_weights(ids, extra[5])) != extra:
+                return None, ERR_INCONSISTENT
+        secret = by_index.get(16) or _ms32_combine(chosen, _lagrange_weights(ids, 16))
+    decoded = convertbits(secret[6:], 5, 8, False)
+    if decoded is None or not 16 <= len(decoded) <= 64:
+        return None, ERR_PAYLOAD
+    return bytes(decoded), None
 
 
 def derive_share(string_list, fresh_share_index):
@@ -242,23 +412,53 @@ def derive_share(string_list, fresh_share_index):
     ms32_share_index = CHARSET.find(fresh_share_index.lower())
     if ms32_share_index < 0:
         return None
-    interpolated = ms32_interpolate(validate_set(string_list), ms32_share_index)
-    return ms32_encode(ms32_decode(string_list[0])[0], interpolated)
+    interpolated = ms32_interpolate_bytes(_validate_set_bytes(string_list), [ms32_share_index])[0]
+    return ms32_encode(ms32_decode_bytes(string_list[0])[0], interpolated)
 
 
-def fingerprint(seed):
-    """Generate a 4-character bech32 fingerprint from a master seed."""
-    BIP32Node._generator = secp256k1_generator
-    node = BIP32Node.from_master_secret(seed)
-    return convertbits(node.fingerprint(), 8, 5)[:4]
+def _bip32_fingerprint(seed):
+    """First 4 bytes of HASH160 of the compressed BIP32 master public key of seed."""
+    from pycoin.ecdsa.secp256k1 import secp256k1_generator
+    from pycoin.encoding.hash import hash160
+    I = hmac.new(b"Bitcoin seed", seed, hashlib.sha512).digest()
+    x, y = secp256k1_generator * int.from_bytes(I[:32], "big")
+    return hash160(bytes([2 + (y & 1)]) + x.to_bytes(32, "big"))[:4]
+
+
+# Fingerprints keyed by an HMAC of the seed, so repeats skip the point multiplication;
+# the random key keeps the cache from confirming guessed seeds.
+_FINGERPRINT_CACHE_SIZE = 256
+_fingerprint_cache_key = os.urandom(32)
+_fingerprint_cache = OrderedDict()
+_fingerprint_lock = threading.Lock()
 
 
-def encode_secret(secret, hrp='ms', k='0', ident='', index='s', pad_val='xor'):
-    """Encode a codex32 string."""
+def fingerprint(seed):
+    """Generate a 4-character bech32 fingerprint from a master seed."""
+    seed_id = hmac.new(_fingerprint_cache_key, seed, hashlib.sha256).digest()
+    with _fingerprint_lock:
+        fp = _fingerprint_cache.get(seed_id)
+        if fp is not None:
+            _fingerprint_cache.move_to_end(seed_id)
+            return list(fp)
+    fp = convertbits(_bip32_fingerprint(seed), 8, 5)[:4]
+    with _fingerprint_lock:
+        _fingerprint_cache[seed_id] = fp
+        while len(_fingerprint_cache) > _FINGERPRINT_CACHE_SIZE:
+            _fingerprint_cache.popitem(last=False)
+    return list(fp)
+
+
+def encode_secret(secret, hrp='ms', k='0', ident='', index='s', pad_val='xor', verify=True):
+    """Encode a codex32 string, decoding it again to check it unless verify is False."""
     if not ident:
         ident = "".join([CHARSET[x] for x in fingerprint(secret)])
     ms32_header = [CHARSET.find(x) for x in k + ident + index]
     payload = convertbits(secret, 8, 5, pad_val=pad_val)
+    if not verify:
+        if len(ms32_header) != 6 or not validate_data_set([ms32_header + payload], len_must_match_k=False):
+            return None
+        return ms32_encode(hrp, ms32_header + payload)
     ret = ms32_encode(hrp, ms32_header + payload)
     if not decode_secret(hrp, ret):
         return None
@@ -1,15 +1,20 @@
 import argparse
 import binascii
+import json
+import sys
+import time
+from itertools import islice
 
-from mnemonic import Mnemonic as bip39
-from pycoin.symbols.btc import network as BTC
+from bip85 import BIP85, app
 
-from bip85 import app
+# The CLI derives everything from one root, so the BIP39 seed is worth keeping.
+_bip85 = BIP85(seed_cache_size=1)
 
 
 def _bip32_master_seed_to_xprv(bip32_master_seed: bytes):
     if len(bip32_master_seed) < 16 or len(bip32_master_seed) > 64:
         raise ValueError('BIP32 master seed must be between 128 and 512 bits')
+    from pycoin.symbols.btc import network as BTC
     xprv = BTC.keys.bip32_seed(bip32_master_seed).hwif(as_private=True)
     return xprv
 
@@ -22,13 +27,81 @@ def _get_xprv_from_args(args):
             bytearray.fromhex(args.bip32_master_seed))
     bip39_mnemonic = args.bip39_mnemonic
     if args.bip39_entropy:
-        bip39_mnemonic = bip39(args.language).to_mnemonic(
+        from mnemonic import Mnemonic as bip39
+        bip39_mnemonic = bip39(getattr(args, 'language', 'english')).to_mnemonic(
             binascii.unhexlify(args.bip39_entropy))
-    return _bip32_master_seed_to_xprv(bip39.to_seed(bip39_mnemonic))
+    return _bip85.bip39_mnemonic_to_xprv(bip39_mnemonic)
+
+def _write_rolls(rolls, out, chunk_size=65536):
+    # Write comma-separated rolls a chunk at a time so output starts immediately.
+    chunk = list(islice(rolls, chunk_size))
+    separator = ''
+    while chunk:
+        out.write(separator + ",".join(chunk))
+        out.flush()
+        separator = ','
+        chunk = list(islice(rolls, chunk_size))
+    out.write("\n")
+
+
+def _run_batch(xprv, manifest, out, report_every=1000):
+    # One JSON job per line, e.g. {"app": "hex", "index": 0, "width": 32}; results
+    # echo the job with a "result" or "error" key and are written as they finish.
+    start = time.perf_counter()
+    count = 0
+    for line in manifest:
+        if not line.strip():
+            continue
+        job = None
+        try:
+            job = json.loads(line)
+            record = dict(job, result=app.run_job(xprv, job))
+        except Exception as e:  # one bad job must not abort the rest of the batch
+            record = dict(job if isinstance(job, dict) else {}, error=f"{type(e).__name__}: {e}")
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+        count += 1
+        if count % report_every == 0:
+            _report_throughput(count, start)
+    _report_throughput(count, start)
+
+
+def _run_codex32_audit(lines, out, show_seeds=False):
+    # One JSON report per share set, then one per undecodable line; line numbers
+    # are reported instead of the strings so the report holds no share data.
+    from bip85 import bip93
+    numbered = [(number, line) for number, line in enumerate(lines, 1) if line.strip()]
+    groups, invalid = bip93.recover_master_seeds([line for _, line in numbered])
+    for group in groups:
+        record = {"hrp": group["hrp"], "k": group["k"], "identifier": group["identifier"],
+                  "lines": [numbered[i][0] for i in group["positions"]], "error": group["error"]}
+        if show_seeds and group["seed"] is not None:
+            record["seed"] = group["seed"].hex()
+        out.write(json.dumps(record) + "\n")
+    for i in invalid:
+        out.write(json.dumps({"lines": [numbered[i][0]], "error": bip93.ERR_DECODE}) + "\n")
+    failed = sum(group["error"] is not None for group in groups) + len(invalid)
+    print(f"{len(groups)} share sets, {failed} problems", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _report_throughput(count, start):
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0.0
+    print(f"{count} jobs in {elapsed:.3f}s ({rate:.1f} jobs/sec)", file=sys.stderr)
+
 
 def main():
     parser = argparse.ArgumentParser(description='BIP85 CLI tool')
-    seed_group = parser.add_mutually_exclusive_group(required=True)
+    # Not required by argparse because codex32-audit takes no seed.
+    seed_group = parser.add_mutually_exclusive_group()
     seed_group.add_argument(
         '--bip32-master-seed',
         help='Input BIP32 master seed (AKA initial entropy), which is usually '
@@ -42,8 +115,7 @@ def main():
                             help='Input BIP32 root master private key')
     parser.add_argument('--index',
                         type=int,
-                        required=True,
-                        help='Derived key index')
+                        help='Derived key index (required except for batch and serve)')
     subparsers = parser.add_subparsers(dest='bip85_app')
     subparsers.required = True
     app_bip39_parser = subparsers.add_parser('bip39',
@@ -83,7 +155,14 @@ def main():
                                   type=str,
                                   default='????',
                                   help='Four character identifier for codex32 backup')
-    subparsers.add_parser('wif', help='Derive a HD-Seed WIF')
+    app_wif_parser = subparsers.add_parser('wif', help='Derive a HD-Seed WIF')
+    app_wif_parser.add_argument('--count',
+                                type=_positive_int,
+                                default=1,
+                                help='Derive this many consecutive indexes, starting at --index')
+    app_wif_parser.add_argument('--raw',
+                                action='store_true',
+                                help='Write the 32-byte private keys packed as binary instead of WIFs')
     subparsers.add_parser('xprv', help='Derive an XPRV (master private key)')
     app_hex_parser = subparsers.add_parser('hex',
                                            help='Derive a HEX bytes sequence')
@@ -114,8 +193,71 @@ def main():
                                 required=True,
                                 help='Number of values to generate'
                                 )
+    app_dice_parser.add_argument('--stream',
+                                action='store_true',
+                                help='Write rolls incrementally instead of all at once, without the banner line'
+                                )
+    app_rsa_parser = subparsers.add_parser('rsa', help='Derive an RSA private key (PKCS#1 PEM)')
+    app_rsa_parser.add_argument('--bits',
+                                type=int,
+                                required=True,
+                                choices=(1024, 2048, 3072, 4096),
+                                help='RSA modulus length in bits')
+    app_rsa_parser.add_argument('--cache-dir',
+                                help='Keep derived keys, encrypted, in this directory')
+    app_rsa_parser.add_argument('--count',
+                                type=_positive_int,
+                                default=1,
+                                help='Derive this many consecutive indexes, starting at --index')
+    app_rsa_parser.add_argument('--workers',
+                                type=_positive_int,
+                                help='Processes used when --count > 1 (default: CPU count)')
+    app_batch_parser = subparsers.add_parser('batch', help='Derive every job in a JSONL manifest')
+    app_batch_parser.add_argument('--manifest',
+                                  type=argparse.FileType('r'),
+                                  required=True,
+                                  help='JSONL file of jobs, e.g. {"app": "hex", "index": 0, "width": 32}; - for stdin')
+    app_batch_parser.add_argument('--output',
+                                  type=argparse.FileType('w'),
+                                  default=sys.stdout,
+                                  help='JSONL results file (default: stdout)')
+    app_audit_parser = subparsers.add_parser('codex32-audit',
+                                             help='Recover and check every codex32 share set in a file')
+    app_audit_parser.add_argument('file',
+                                  type=argparse.FileType('r'),
+                                  help='File of codex32 strings, one per line, sets in any order; - for stdin')
+    app_audit_parser.add_argument('--show-seeds',
+                                  action='store_true',
+                                  help='Include recovered master seeds (hex) in the report')
+    app_serve_parser = subparsers.add_parser('serve', help='Answer derivation requests on a Unix socket')
+    app_serve_parser.add_argument('--socket',
+                                  required=True,
+                                  help='Path of the Unix socket to listen on')
     args = parser.parse_args()
+    if args.bip85_app == 'codex32-audit':
+        sys.exit(_run_codex32_audit(args.file, sys.stdout, args.show_seeds))
+    if not (args.xprv or args.bip32_master_seed or args.bip39_entropy or args.bip39_mnemonic):
+        parser.error('one of the arguments --bip32-master-seed --bip39-entropy --bip39-mnemonic --xprv is required')
+    if args.bip85_app not in ('batch', 'serve') and args.index is None:
+        parser.error('the following arguments are required: --index')
     xprv = _get_xprv_from_args(args)
+    if args.bip85_app == 'batch':
+        _run_batch(xprv, args.manifest, args.output)
+        return
+    if args.bip85_app == 'serve':
+        from bip85 import server
+        print(f"Serving on {args.socket}", file=sys.stderr)
+        server.serve(xprv, args.socket)
+        return
+    if args.bip85_app == 'wif' and (args.raw or args.count > 1):
+        # Bulk output is for piping, so no banner line.
+        app.write_wif_range(xprv, args.index, args.index + args.count, sys.stdout.buffer, args.raw)
+        sys.stdout.buffer.flush()
+        return
+    if args.bip85_app == 'dice' and args.stream:
+        # Streamed rolls are usually redirected to a file, so no banner line either.
+        _write_rolls(app.iter_dice(xprv, args.sides, args.rolls, args.index), sys.stdout)
+        return
     print(f"Using master private key: {xprv}")
     if args.bip85_app == 'bip39':
         print(app.bip39(xprv, args.language, args.num_words, args.index))
@@ -134,6 +276,14 @@ def main():
         print(app.base85(xprv, args.pwd_len, args.index))
     elif args.bip85_app == 'dice':
         print(app.dice(xprv, args.sides, args.rolls, args.index))
+    elif args.bip85_app == 'rsa' and args.count > 1:
+        from bip85 import parallel
+        for index, pem in parallel.derive_range('rsa', xprv, args.index, args.index + args.count,
+                                                workers=args.workers, chunk_size=1,
+                                                bits=args.bits, cache_dir=args.cache_dir):
+            print(f"# index {index}\n{pem.decode()}")
+    elif args.bip85_app == 'rsa':
+        print(app.rsa(xprv, args.bits, args.index, args.cache_dir).decode())
 
 
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Memory and encrypted on-disk cache for derivations too slow to repeat, such as RSA keys."""
+
+import hashlib
+import hmac
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from bip85 import metrics
+
+_NONCE_SIZE = 12
+_TAG_SIZE = 16
+
+
+class KeyCache(object):
+    """LRU of derived keys, optionally backed by a directory of AES-GCM encrypted files.
+
+    Entries are looked up by an HMAC of the entropy they were derived from, and
+    files are encrypted under a second HMAC of it, so a cache directory reveals
+    nothing to anyone who cannot already derive the keys.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _hmac(self, entropy, purpose, label):
+        return hmac.new(entropy, msg=b"bip85-key-cache/" + purpose + b"/" + label.encode(),
+                        digestmod=hashlib.sha256).digest()
+
+    def get_or_derive(self, entropy, label, derive, directory=None):
+        """Return the cached bytes for (entropy, label), calling derive() on a miss.
+
+        With a directory, misses in memory are looked up there and new values saved there.
+        """
+        cache_id = self._hmac(entropy, b"id", label)
+        with self._lock:
+            value = self._entries.get(cache_id)
+            if value is not None:
+                self._entries.move_to_end(cache_id)
+        if value is None and directory is not None:
+            value = self._read(directory, cache_id, self._hmac(entropy, b"key", label))
+        metrics.count("key_cache", "miss" if value is None else "hit")
+        if value is None:
+            value = derive()
+            if directory is not None:
+                self._write(directory, cache_id, self._hmac(entropy, b"key", label), value)
+        self._put(cache_id, value)
+        return value
+
+    def _put(self, cache_id, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[cache_id] = value
+            self._entries.move_to_end(cache_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _read(self, directory, cache_id, key):
+        from Crypto.Cipher import AES
+        try:
+            with open(os.path.join(directory, cache_id.hex()), 'rb') as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        nonce, tag, ciphertext = blob[:_NONCE_SIZE], blob[_NONCE_SIZE:_NONCE_SIZE + _TAG_SIZE], \
+            blob[_NONCE_SIZE + _TAG_SIZE:]
+        try:
+            return AES.new(key, AES.MODE_GCM, nonce=nonce).decrypt_and_verify(ciphertext, tag)
+        except ValueError:
+            # Truncated or tampered entry: derive again and overwrite it.
+            return None
+
+    def _write(self, directory, cache_id, key, value):
+        from Crypto.Cipher import AES
+        nonce = os.urandom(_NONCE_SIZE)
+        ciphertext, tag = AES.new(key, AES.MODE_GCM, nonce=nonce).encrypt_and_digest(value)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # mkstemp gives each writer, thread or process, its own 0600 file to rename.
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=f"{cache_id.hex()}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(nonce + tag + ciphertext)
+            os.replace(tmp, os.path.join(directory, cache_id.hex()))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def clear(self):
+        """Forget the in-memory entries; files on disk are left in place."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Opt-in timing spans and counters for the derivation hot paths.
+
+Nothing is recorded until a sink is installed with set_sink(). Span and counter
+names and labels are fixed strings chosen by the library (phase and application
+names), never paths, indexes, keys, entropy or output.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds of the histogram buckets; durations above the last go to +Inf.
+DEFAULT_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                   1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+# The installed sink, or None while disabled. Hot paths test this directly and
+# only take spans when it is set, since even a null span costs a few hundred ns.
+sink = None
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+# Shared by every span taken while disabled, so the disabled path allocates nothing.
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    __slots__ = ('_sink', '_name', '_label', '_start')
+
+    def __init__(self, sink, name, label):
+        self._sink = sink
+        self._name = name
+        self._label = label
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._sink.observe(self._name, self._label, time.perf_counter() - self._start)
+        return False
+
+
+def set_sink(new_sink):
+    """Install new_sink to receive spans and counts (None disables); returns the previous sink."""
+    global sink
+    previous, sink = sink, new_sink
+    return previous
+
+
+def enabled():
+    return sink is not None
+
+
+def span(name, label=None):
+    """Context manager timing one phase, e.g. span("encode", "bip39")."""
+    current = sink
+    if current is None:
+        return _NULL_SPAN
+    return _Span(current, name, label)
+
+
+def count(name, label=None, value=1):
+    current = sink
+    if current is not None:
+        current.count(name, label, value)
+
+
+class HistogramSink(object):
+    """Keeps a duration histogram per (span, label) and a total per (counter, label)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, label, seconds):
+        with self._lock:
+            histogram = self._histograms.get((name, label))
+            if histogram is None:
+                histogram = self._histograms[(name, label)] = {
+                    'count': 0, 'sum': 0.0, 'min': seconds, 'max': seconds,
+                    'buckets': [0] * (len(self.buckets) + 1)}
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+            histogram['min'] = min(histogram['min'], seconds)
+            histogram['max'] = max(histogram['max'], seconds)
+            histogram['buckets'][bisect_left(self.buckets, seconds)] += 1
+
+    def count(self, name, label, value):
+        with self._lock:
+            self._counters[(name, label)] = self._counters.get((name, label), 0) + value
+
+    def snapshot(self):
+        """Return copies of the histograms and counters, keyed by (name, label)."""
+        with self._lock:
+            histograms = {key: dict(h, buckets=list(h['buckets'])) for key, h in self._histograms.items()}
+            return {'spans': histograms, 'counters': dict(self._counters)}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+class LoggingSink(object):
+    """Logs every span and count, for ad hoc tracing rather than production."""
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger('bip85.metrics')
+        self.level = level
+
+    def observe(self, name, label, seconds):
+        self.logger.log(self.level, "span %s[%s] %.9fs", name, label or '', seconds)
+
+    def count(self, name, label, value):
+        self.logger.log(self.level, "count %s[%s] +%d", name, label or '', value)
+
+
+def _prometheus_labels(**labels):
+    pairs = ",".join(f'{k}="{v}"' for k, v in labels.items() if v is not None)
+    return "{" + pairs + "}" if pairs else ""
+
+
+class PrometheusSink(HistogramSink):
+    """HistogramSink that write() exports in the Prometheus text format, e.g. for
+    node_exporter's textfile collector."""
+
+    def __init__(self, path, buckets=DEFAULT_BUCKETS):
+        super().__init__(buckets)
+        self.path = path
+
+    def render(self):
+        snapshot = self.snapshot()
+        lines = ["# TYPE bip85_span_seconds histogram"]
+        for (name, label), h in sorted(snapshot['spans'].items(), key=lambda item: str(item[0])):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), h['buckets']):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"bip85_span_seconds_bucket{_prometheus_labels(span=name, label=label, le=le)} "
+                             f"{cumulative}")
+            lines.append(f"bip85_span_seconds_sum{_prometheus_labels(span=name, label=label)} {h['sum']!r}")
+            lines.append(f"bip85_span_seconds_count{_prometheus_labels(span=name, label=label)} {h['count']}")
+        lines.append("# TYPE bip85_events_total counter")
+        for (name, label), value in sorted(snapshot['counters'].items(), key=lambda item: str(item[0])):
+            lines.append(f"bip85_events_total{_prometheus_labels(event=name, label=label)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        # Write then rename so a collector never reads a partial file; mkstemp gives
+        # each concurrent writer its own temporary file.
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.',
+                                   prefix=f"{os.path.basename(self.path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.render())
+            os.chmod(tmp, 0o644)  # readable by the collector, as open() would have made it
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Process-pool derivation of large index ranges for the applications in app.py."""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from bip85 import app, metrics
+
+_worker_job = None
+
+
+def _init_worker(parent_xprv, name, params):
+    global _worker_job
+    # A forked copy of the caller's sink would record into memory that is thrown
+    # away; derivations are counted in the caller as chunks come back instead.
+    metrics.set_sink(None)
+    _, encode, *args = app._JOBS[name](**params)
+    _worker_job = parent_xprv, encode, args
+
+
+def _derive_chunk(bounds):
+    parent_xprv, encode, args = _worker_job
+    # The parent is the root of the worker's range, so it is parsed once and cached.
+    return [result for _, result in app._derive_range(parent_xprv, *bounds, "", encode, *args)]
+
+
+def derive_range(name, xprv_string, start, stop, workers=None, chunk_size=256, **params):
+    """Yield (index, result) for application name over start <= index < stop, in index order.
+
+    params are the application's keyword arguments, e.g.
+    derive_range('hex', xprv, 0, 100000, width=32). With a metrics sink installed,
+    derivations are counted per application; spans inside the workers are not recorded.
+    """
+    if chunk_size < 1:
+        raise ValueError("ERROR: chunk_size must be positive")
+    if start < 0 or stop > 0x80000000:
+        raise ValueError("ERROR: Index must be between 0 and 2^31 - 1")
+    prefix = app._range_job(name, start, stop, **params)[0]
+    parent_xprv = app._bip85.bip32_xprv_to_node(prefix, xprv_string).hwif(as_private=True)
+    return _derive_parallel(parent_xprv, name, params, start, stop, workers or os.cpu_count() or 1, chunk_size)
+
+
+def _derive_parallel(parent_xprv, name, params, start, stop, workers, chunk_size):
+    chunks = ((i, min(i + chunk_size, stop)) for i in range(start, stop, chunk_size))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(parent_xprv, name, params)) as executor:
+        # Keep a bounded window of chunks in flight so memory stays flat.
+        pending = deque()
+        for bounds in chunks:
+            pending.append((bounds[0], executor.submit(_derive_chunk, bounds)))
+            if len(pending) >= 2 * workers:
+                yield from _drain(pending.popleft(), name)
+        while pending:
+            yield from _drain(pending.popleft(), name)
+
+
+def _drain(item, name):
+    first, future = item
+    results = future.result()
+    metrics.count("derivations", name, len(results))
+    for offset, result in enumerate(results):
+        yield first + offset, result
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Local derivation daemon over a Unix socket, and a client for it.
+
+Every message is a 4-byte big-endian length followed by that many bytes of JSON.
+Requests are app.run_job jobs, e.g. {"app": "hex", "index": 0, "width": 32};
+responses are {"result": ...} or {"error": "..."}, plus the request's "id" if any.
+"""
+
+import asyncio
+import errno
+import functools
+import json
+import os
+import signal
+import socket
+import stat
+
+from bip85 import app
+
+MAX_MESSAGE_SIZE = 1 << 20
+
+
+def _encode_message(obj):
+    data = json.dumps(obj).encode()
+    return len(data).to_bytes(4, "big") + data
+
+
+async def _handle(xprv_string, reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                length = int.from_bytes(await reader.readexactly(4), "big")
+                if length > MAX_MESSAGE_SIZE:
+                    break
+                payload = await reader.readexactly(length)
+            except asyncio.IncompleteReadError:
+                break
+            job = None
+            try:
+                job = json.loads(payload)
+                # Derivation is CPU-bound; keep the loop free for other clients.
+                response = {"result": await loop.run_in_executor(None, app.run_job, xprv_string, job)}
+            except Exception as e:  # a malformed job still gets a reply
+                response = {"error": f"{type(e).__name__}: {e}"}
+            if isinstance(job, dict) and "id" in job:
+                response["id"] = job["id"]
+            writer.write(_encode_message(response))
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+def _socket_id(path):
+    # (st_dev, st_ino) of the socket at path, or None if path is not a socket.
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_dev, st.st_ino) if stat.S_ISSOCK(st.st_mode) else None
+
+
+def _remove_stale_socket(path):
+    # A socket left by a daemon that died is removed; one still answering is not.
+    if _socket_id(path) is None:
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    except FileNotFoundError:
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, "ERROR: A bip85 daemon is already listening", path)
+
+
+async def start_server(xprv_string, path):
+    """Start answering derivation requests for xprv_string on the Unix socket at path."""
+    _remove_stale_socket(path)
+    # Create the socket owner-only; it serves key material.
+    old_umask = os.umask(0o177)
+    try:
+        return await asyncio.start_unix_server(functools.partial(_handle, xprv_string), path=path)
+    finally:
+        os.umask(old_umask)
+
+
+def serve(xprv_string, path):
+    """Serve until SIGINT or SIGTERM, then remove the socket."""
+    bound_id = None
+
+    async def main():
+        nonlocal bound_id
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        async with await start_server(xprv_string, path):
+            bound_id = _socket_id(path)
+            await stop.wait()
+    try:
+        asyncio.run(main())
+    finally:
+        # Only remove the socket this process bound, not one another daemon put at path since.
+        if bound_id is not None and _socket_id(path) == bound_id:
+            os.unlink(path)
+
+
+class Client(object):
+    """Blocking client for a bip85 daemon, e.g. Client(path).derive('hex', index=0, width=32)."""
+
+    def __init__(self, path):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+
+    def request(self, job):
+        self._sock.sendall(_encode_message(job))
+        length = int.from_bytes(self._recv_exactly(4), "big")
+        return json.loads(self._recv_exactly(length))
+
+    def derive(self, app_name, **params):
+        response = self.request(dict(params, app=app_name))
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    def _recv_exactly(self, n):
+        data = b''
+        while len(data) < n:
+            chunk = self._sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("bip85 daemon closed the connection")
+            data += chunk
+        return data
+
+    def close(self):
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from bip85 import aio, app
+import pytest
+
+XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
+MNEMONIC = 'install scatter logic circle pencil average fall shoe quantum disease suspect usage'
+
+
+def test_applications():
+    async def main():
+        return await asyncio.gather(
+            aio.bip39(XPRV, 'english', 18, 0),
+            aio.wif(XPRV, 0),
+            aio.hex(XPRV, 0, 32),
+            aio.base85(XPRV, pwd_len=12, index=0),
+            aio.dice(XPRV, sides=6, rolls=10, index=0),
+            aio.bip39_mnemonic_to_entropy("m/83696968'/0'/0'", MNEMONIC))
+    results = asyncio.run(main())
+    assert results[:5] == [app.bip39(XPRV, 'english', 18, 0), app.wif(XPRV, 0), app.hex(XPRV, 0, 32),
+                           b'_s`{TW89)i4`', '1,0,0,2,0,1,5,5,2,4']
+    assert results[5].hex().startswith('efecfbccffea3132')
+
+
+def test_process_executor():
+    with ProcessPoolExecutor(1) as executor:
+        aio.set_executor(executor)
+        try:
+            assert asyncio.run(aio.xprv(XPRV, 0)) == app.xprv(XPRV, 0)
+        finally:
+            aio.set_executor(None)
+
+
+def test_coalesce_and_cancel():
+    calls = []
+    release = threading.Event()
+
+    def slow(x):
+        calls.append(x)
+        release.wait(5)
+        return x * 2
+
+    async def main():
+        first = asyncio.ensure_future(aio._run(slow, 21))
+        second = asyncio.ensure_future(aio._run(slow, 21))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        assert await second == 42
+        assert first.cancelled()
+        assert await aio._run(slow, 21) == 42
+
+    asyncio.run(main())
+    assert calls == [21, 21]
+    assert not aio._inflight
+
+
+if __name__ == "__main__":
+    pytest.main()
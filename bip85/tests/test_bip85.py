@@ -20,8 +20,16 @@
 # WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-from bip85 import BIP85
+from bip85 import BIP85, _get_mnemonic
+from bip85 import BIP85DRNG
 from bip85 import app
+from bip85 import parallel
+import functools
+import hashlib
+import io
+import math
+from mnemonic import Mnemonic
+from pycoin.symbols.btc import network as BTC
 import pytest
 
 XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
@@ -44,6 +52,21 @@ def test_mnemonic_pwd():
     assert test.hex() == expected
 
 
+def test_seed_cache():
+    bip85 = BIP85(seed_cache_size=1)
+    mnemonic = 'install scatter logic circle pencil average fall shoe quantum disease suspect usage'
+    expected = BIP85().bip39_mnemonic_to_entropy("m/83696968'/0'/0'", mnemonic, 'TREZOR')
+    assert bip85.bip39_mnemonic_to_entropy("m/83696968'/0'/0'", mnemonic, 'TREZOR') == expected
+    seed = next(iter(bip85._seed_cache.values()))
+    assert bip85.bip39_mnemonic_to_entropy("m/83696968'/0'/0'", mnemonic, 'TREZOR') == expected
+    assert bip85.bip39_mnemonic_to_xprv(mnemonic) == XPRV
+    # the TREZOR seed was evicted and zeroised
+    assert len(bip85._seed_cache) == 1 and seed == bytes(64)
+    bip85.clear_cache()
+    assert not bip85._seed_cache
+    assert not BIP85()._seed_cache_size
+
+
 def test_xprv_to_entropy():
     bip85 = BIP85()
     test = bip85.bip32_xprv_to_entropy("m/83696968'/0'/0'", XPRV)
@@ -69,6 +92,37 @@ def test_wif_from_entropy():
     entropy = bip85.bip32_xprv_to_entropy("m/83696968'/2'/0'", XPRV)
     entropy = entropy[:32]
     assert bip85.entropy_to_wif(entropy) == 'Kzyv4uF39d4Jrw2W7UryTHwZr1zQVNk4dAFyqE6BuMrMh1Za7uhp'
+    with pytest.raises(ValueError, match='out of range'):
+        bip85.entropy_to_wif(bytes(32))
+
+def test_wif_bulk():
+    wifs = [wif for _, wif in app.wif_range(XPRV, 0, 5)]
+    assert wifs[0] == 'Kzyv4uF39d4Jrw2W7UryTHwZr1zQVNk4dAFyqE6BuMrMh1Za7uhp'
+    text, packed = io.BytesIO(), io.BytesIO()
+    app.write_wif_range(XPRV, 0, 5, text, chunk_size=2)
+    app.write_wif_range(XPRV, 0, 5, packed, raw=True, chunk_size=2)
+    assert text.getvalue().decode().splitlines() == wifs
+    assert len(packed.getvalue()) == 5 * 32
+    packed.seek(0)
+    assert list(BIP85().secrets_to_wif(iter(functools.partial(packed.read, 32), b''))) == wifs
+
+@pytest.mark.parametrize('words', [12, 15, 18, 21, 24])
+@pytest.mark.parametrize('language', app.LANGUAGE_LOOKUP)
+def test_mnemonic_encoder(language, words):
+    bip85 = BIP85()
+    width = words * 4 // 3
+    reference = Mnemonic(language)
+    for entropy in [bytes(64), b'\xff' * 64] + [hashlib.sha512(bytes([i])).digest() for i in range(20)]:
+        assert bip85.entropy_to_bip39(entropy, words, language) == reference.to_mnemonic(entropy[:width])
+    assert _get_mnemonic(language) is _get_mnemonic(language)
+
+
+@pytest.mark.parametrize('words', [0, 11, 13, 14, 20, 25])
+def test_mnemonic_bad_word_count(words):
+    with pytest.raises(ValueError, match='number of words'):
+        BIP85().entropy_to_bip39(bytes(64), words)
+    with pytest.raises(ValueError, match='number of words'):
+        app.bip39(XPRV, 'english', words, 0)
 
 def test_mnemonic():
     bip85 = BIP85()
@@ -112,11 +166,19 @@ def test_entropy_to_codex32():
     entropy = bip85.bip32_xprv_to_entropy("m/83696968'/93'/0'/2'/1'/64'/32'/29'/19'/19'/0'", XPRV)
     existing_seed_two = {'identifier': 'mann', 'codex32': ['ms12mannaczq4kkph3gtppqu5ehjes6fvsyh09m0tk3ag5z3tkq5p5menyjpukyy2dvddk4yu979949g08jlfdt4w946we8dynamcu22c0tr6s2rndpnrmqac6z23nd']}
     assert bip85.entropy_to_bip93(entropy, threshold=2, n=1, byte_length=64, id=[32,29,19,19]) == existing_seed_two
+    assert bip85.entropy_to_bip93(entropy, threshold=2, n=1, byte_length=64, id=[32,29,19,19],
+                                  verify=False) == existing_seed_two
 
 def test_xprv():
     bip85 = BIP85()
     result = bip85.bip32_xprv_to_xprv("83696968'/32'/0'", XPRV)
     assert result == 'xprv9s21ZrQH143K2srSbCSg4m4kLvPMzcWydgmKEnMmoZUurYuBuYG46c6P71UGXMzmriLzCCBvKQWBUv3vPB3m1SATMhp3uEjXHJ42jFg7myX'
+    chain_code, key = bip85.bip32_xprv_to_xprv("83696968'/32'/0'", XPRV, raw=True)
+    node = BTC.parse(result)
+    assert (chain_code, key) == (node.chain_code(), node.secret_exponent().to_bytes(32, 'big'))
+    for key in (bytes(32), bytes.fromhex('FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141')):
+        with pytest.raises(ValueError, match='out of range'):
+            bip85.entropy_to_xprv(bytes(32) + key)
 
 @pytest.mark.parametrize('path, width, expect', [
         ("83696968'/128169'/32'/0'", 32, 'ea3ceb0b02ee8e587779c63f4b7b3a21e950a213f1ec53cab608d13e8796e6dc'),
@@ -133,6 +195,9 @@ def test_bipentropy_applications():
     
     assert app.bip93(XPRV, hrp='ms', threshold=0, n=1, byte_length=16, identifier='c0??', index=1) == \
            {'identifier': 'c0zc', 'codex32': ['ms10c0zcs35ddcltwzsrjnz8vh97s8ml0dara49ch74gxm5x']}
+    for identifier in ('c0?', 'c0???'):
+        with pytest.raises(ValueError, match='Identifier must be 4 characters'):
+            app.bip93(XPRV, hrp='ms', threshold=0, n=1, byte_length=16, identifier=identifier, index=0)
 
     assert app.xprv(XPRV, 0) == \
            'xprv9s21ZrQH143K2srSbCSg4m4kLvPMzcWydgmKEnMmoZUurYuBuYG46c6P71UGXMzmriLzCCBvKQWBUv3vPB3m1SATMhp3uEjXHJ42jFg7myX'
@@ -147,5 +212,92 @@ def test_bipentropy_applications():
 
     assert app.dice(XPRV, sides=6, rolls=10, index=0) == '1,0,0,2,0,1,5,5,2,4'
 
+    assert ",".join(app.iter_dice(XPRV, sides=6, rolls=10, index=0)) == '1,0,0,2,0,1,5,5,2,4'
+    assert ",".join(app.iter_dice(XPRV, sides=1000, rolls=5000, index=3)) == app.dice(XPRV, 1000, 5000, 3)
+
+@pytest.mark.parametrize('sides', [2, 3, 6, 10, 255, 256, 257, 1000, 65536, 65537, 2 ** 24 + 1, 2 ** 32 - 1])
+def test_do_rolls_sampling(sides):
+    # one candidate per loop iteration, as do_rolls was originally written
+    bip85 = BIP85()
+    entropy = bip85.bip32_xprv_to_entropy("m/83696968'/89101'/6'/10'/0'", XPRV)
+    max_width = len(str(sides - 1))
+    bits_per_roll = math.ceil(math.log(sides, 2))
+    bytes_per_roll = math.ceil(bits_per_roll / 8)
+    drng = BIP85DRNG.new(entropy)
+    history = []
+    while len(history) < 300:
+        trial_int = int.from_bytes(drng.read(bytes_per_roll), "big") >> (8 * bytes_per_roll - bits_per_roll)
+        if trial_int < sides:
+            history.append(f"{trial_int:0{max_width}d}")
+    for rolls in (1, 7, 300):
+        assert bip85.do_rolls(entropy, sides, rolls) == ",".join(history[:rolls])
+    batches = list(bip85.iter_roll_batches(entropy, sides, 300, batch_size=16))
+    assert len(batches) > 1 and sum(batches, []) == history
+
+
+@pytest.mark.parametrize('single, batch, params', [
+        (app.bip39, app.bip39_range, {'language': 'english', 'words': 12}),
+        (app.bip93, app.bip93_range, {'hrp': 'ms', 'threshold': 2, 'n': 3, 'byte_length': 16, 'identifier': '????'}),
+        (app.wif, app.wif_range, {}),
+        (app.xprv, app.xprv_range, {}),
+        (app.hex, app.hex_range, {'width': 32}),
+        (app.base64, app.base64_range, {'pwd_len': 21}),
+        (app.base85, app.base85_range, {'pwd_len': 12}),
+        (app.dice, app.dice_range, {'sides': 6, 'rolls': 10}),
+    ])
+def test_application_ranges(single, batch, params):
+    results = list(batch(XPRV, start=2, stop=6, **params))
+    assert [i for i, _ in results] == [2, 3, 4, 5]
+    for index, result in results:
+        assert result == single(XPRV, index=index, **params)
+
+
+def test_range_validation():
+    with pytest.raises(ValueError):
+        app.bip93_range(XPRV, 'ms', 2, 3, 16, 'c0??', 0, 7)
+    with pytest.raises(ValueError):
+        app.dice_range(XPRV, 1, 10, 0, 5)
+    with pytest.raises(ValueError):
+        list(app.hex_range(XPRV, 32, -1, 5))
+    assert list(app.hex_range(XPRV, 32, 5, 5)) == []
+
+
+@pytest.mark.parametrize('name, params', [
+        ('hex', {'width': 64}),
+        ('bip93', {'hrp': 'ms', 'threshold': 3, 'n': 5, 'byte_length': 16, 'identifier': '????'}),
+    ])
+def test_parallel_range(name, params):
+    serial = list(getattr(app, name + '_range')(XPRV, start=3, stop=20, **params))
+    assert list(parallel.derive_range(name, XPRV, 3, 20, workers=2, chunk_size=4, **params)) == serial
+    with pytest.raises(ValueError):
+        parallel.derive_range(name, XPRV, 3, 20, chunk_size=0, **params)
+
+
+def test_node_cache():
+    bip85 = BIP85(cache_size=4)
+    expected = BIP85(cache_size=0).bip32_xprv_to_entropy("m/83696968'/128169'/64'/1234'", XPRV)
+    for _ in range(2):
+        assert bip85.bip32_xprv_to_entropy("m/83696968'/128169'/64'/1234'", XPRV) == expected
+    assert len(bip85._node_cache) == 4
+    other = BIP85().bip32_xprv_to_entropy("m/83696968'/0'/0'", XPRV)
+    assert bip85.bip32_xprv_to_entropy("83696968p/0p/0p", XPRV) == other
+    assert len(bip85._node_cache) == 4
+    bip85.clear_cache()
+    assert not bip85._node_cache
+
+    root = 'xprv9s21ZrQH143K2srSbCSg4m4kLvPMzcWydgmKEnMmoZUurYuBuYG46c6P71UGXMzmriLzCCBvKQWBUv3vPB3m1SATMhp3uEjXHJ42jFg7myX'
+    assert bip85.bip32_xprv_to_entropy("m/83696968'/0'/0'", root) != other
+    with pytest.raises(ValueError, match='Invalid xprv'):
+        bip85.bip32_xprv_to_entropy("m/83696968'/0'/0'", 'xprv')
+
+
+def test_leaf_derivation():
+    # The leaf step is computed without pycoin; it must match BIP32Node.subkey.
+    bip85 = BIP85(cache_size=0)
+    for path in ("m/83696968'/0'/0'", "m/83696968'/0'/7", "m/0"):
+        parent, leaf = path.rsplit('/', 1)
+        node = bip85.bip32_xprv_to_node(parent, XPRV).subkey_for_path(leaf)
+        assert bip85._derive_k(path, bip85._get_root(XPRV)[1]) == node.secret_exponent().to_bytes(32, 'big')
+
 if __name__ == "__main__":
     pytest.main()
@@ -21,6 +21,7 @@
 
 from bip85 import BIP85
 from bip85 import BIP85DRNG
+from Crypto.Hash import SHAKE256
 import pytest
 
 XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
@@ -68,6 +69,17 @@ def test_determinism():
     assert result2 == result3
 
 
+def test_buffered_reads():
+    bip85 = BIP85()
+    test = bip85.bip32_xprv_to_entropy("m/83696968'/0'/0'", XPRV)
+    expected = SHAKE256.new(test).read(30000)
+    drng = BIP85DRNG.new(test)
+    sizes = [1, 2, 1, 0, 135, 136, 137, 4079, 4080, 4081, 1, 8192, 3]
+    result = b''.join(drng.read(size) for size in sizes)
+    assert result == expected[:len(result)]
+    assert drng.read(30000 - len(result)) == expected[len(result):]
+
+
 def test_lengths():
     bip85 = BIP85()
     test = bip85.bip32_xprv_to_entropy("m/83696968'/0'/0'", XPRV)
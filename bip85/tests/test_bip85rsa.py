@@ -21,13 +21,23 @@
 
 from bip85 import BIP85
 from bip85 import BIP85DRNG
+from bip85 import app, cli, parallel
+from bip85.keycache import KeyCache
 from Crypto.PublicKey import RSA
 import pytest
 import hashlib
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
 MNEMONIC = 'install scatter logic circle pencil average fall shoe quantum disease suspect usage'
+# SHA256 of the PEM at m/83696968'/828365'/1024'/index'
+RSA_1024 = ['ee6aa299fe78dc5672a4987c189750c56df32e009b3839b2b47b71f4fbf79361',
+            '690aa314d47cef867641a03bb9c40ba6e27b85075815f3e5b45672ed20c34cd1',
+            'aa9a45ec62acd3a701b13a32df65aa05903ab966286a06bac65dce368b8fb3e6']
 
 
 def test_rsa():
@@ -57,5 +67,75 @@ def test_rsa():
     assert key_hash == expected
 
 
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def rsa_cache():
+    cache = KeyCache()
+    previous = app.set_rsa_cache(cache)
+    yield cache
+    app.set_rsa_cache(previous)
+
+
+def test_entropy_to_rsa():
+    bip85 = BIP85()
+    test = bip85.bip39_mnemonic_to_entropy("m/83696968'/0'/0'", MNEMONIC)
+    key = bip85.entropy_to_rsa(test, 2048).export_key(format='PEM', pkcs=1)
+    assert sha256(key) == '64ff572798a6534c76eda9fd2d7e906a737a1bad893dec31ae3d0488e3f19ed9'
+
+
+def test_rsa_app(rsa_cache):
+    pem = app.rsa(XPRV, 1024, 0)
+    assert sha256(pem) == RSA_1024[0]
+    assert RSA.import_key(pem).size_in_bits() == 1024
+    assert app.rsa(XPRV, 1024, 0) is pem
+    assert [(index, sha256(key)) for index, key in app.rsa_range(XPRV, 1024, 0, 2)] == list(enumerate(RSA_1024[:2]))
+    assert sha256(app.run_job(XPRV, {'app': 'rsa', 'bits': 1024, 'index': 1}).encode()) == RSA_1024[1]
+    with pytest.raises(ValueError, match='at least 1024'):
+        app.rsa(XPRV, 512, 0)
+
+
+def test_disk_cache(rsa_cache, tmp_path):
+    pem = app.rsa(XPRV, 1024, 0, cache_dir=str(tmp_path))
+    [entry] = os.listdir(tmp_path)
+    assert os.stat(tmp_path / entry).st_mode & 0o777 == 0o600
+    assert b'PRIVATE' not in (tmp_path / entry).read_bytes()
+    calls = []
+    entropy = BIP85().bip32_xprv_to_entropy("m/83696968'/828365'/1024'/0'", XPRV)
+    assert KeyCache().get_or_derive(entropy, "rsa/1024", calls.append, str(tmp_path)) == pem
+    assert not calls
+    # A tampered entry is ignored and replaced.
+    (tmp_path / entry).write_bytes(b'\0' * 64)
+    assert KeyCache().get_or_derive(entropy, "rsa/1024", lambda: b'fresh', str(tmp_path)) == b'fresh'
+    assert KeyCache().get_or_derive(entropy, "rsa/1024", calls.append, str(tmp_path)) == b'fresh'
+
+
+def test_concurrent_disk_writes(tmp_path):
+    # Threads writing the same new entry each use their own temporary file.
+    def write(entropy, barrier):
+        barrier.wait()
+        return KeyCache().get_or_derive(entropy, "test", lambda: entropy * 2, str(tmp_path))
+    with ThreadPoolExecutor(8) as executor:
+        for i in range(20):
+            entropy = bytes([i]) * 32
+            barrier = threading.Barrier(8)
+            assert set(executor.map(write, [entropy] * 8, [barrier] * 8)) == {entropy * 2}
+    assert len(os.listdir(tmp_path)) == 20
+
+
+def test_parallel_rsa():
+    results = list(parallel.derive_range('rsa', XPRV, 0, 3, workers=2, chunk_size=1, bits=1024))
+    assert [(index, sha256(key)) for index, key in results] == list(enumerate(RSA_1024))
+
+
+def test_cli_rsa(monkeypatch, capsys, tmp_path):
+    monkeypatch.setattr(sys, 'argv', ['bip85-cli', '--xprv', XPRV, '--index', '0', 'rsa', '--bits', '1024',
+                                      '--cache-dir', str(tmp_path)])
+    cli.main()
+    assert sha256(capsys.readouterr().out.split('\n', 1)[1][:-1].encode()) == RSA_1024[0]
+
+
 if __name__ == "__main__":
     pytest.main()
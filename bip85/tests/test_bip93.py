@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from bip85 import app, bip93
+from pycoin.symbols.btc import network as BTC
+import hashlib
+import pytest
+
+XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
+
+# BIP93 test vector 2
+SHARES = ['MS12NAMEA320ZYXWVUTSRQPNMLKJHGFEDCAXRPP870HKKQRM', 'MS12NAMECACDEFGHJKLMNPQRSTUVWXYZ023FTR2GDZMPY6PN']
+
+
+def _bech32_mul_loop(a, b):
+    res = 0
+    for i in range(5):
+        res ^= a if ((b >> i) & 1) else 0
+        a *= 2
+        a ^= 41 if (32 <= a) else 0
+    return res
+
+
+def _polymod_loop(values, gen, shift):
+    residue = 0x23181B3
+    for v in values:
+        b = residue >> shift
+        residue = (residue & ((1 << shift) - 1)) << 5 ^ v
+        for i in range(5):
+            residue ^= gen[i] if ((b >> i) & 1) else 0
+    return residue
+
+
+def test_polymod_tables():
+    data = [(7 * i + 3) % 32 for i in range(130)]
+    for length in range(len(data)):
+        values = data[:length]
+        assert bip93.ms32_polymod(values) == _polymod_loop(values, bip93.MS32_GEN, 60)
+        assert bip93.ms32_long_polymod(values) == _polymod_loop(values, bip93.MS32_LONG_GEN, 70)
+    for s in SHARES:
+        assert bip93.ms32_verify_checksum(bip93.ms32_decode(s)[4] + bip93.ms32_create_checksum(bip93.ms32_decode(s)[4]))
+    long_secret = ('MS100C8VSM32ZXFGUHPCHTLUPZRY9X8GF2TVDW0S3JN54KHCE6MUA7LQPZYGSFJD6AN074RXVCEMLH8WU3TK925ACDEFGHJKLMNP'
+                   'QRSTUVWXY06FHPV80UNDVARHRAK')
+    assert bip93.ms32_decode(long_secret)[0] == 'ms'
+
+
+def test_bech32_mul_table():
+    for a in range(32):
+        for b in range(33):
+            assert bip93.bech32_mul(a, b) == _bech32_mul_loop(a, b)
+    for a in range(1, 32):
+        assert bip93.bech32_mul(a, bip93.bech32_inv[a]) == 1
+
+
+def test_interpolate():
+    data = bip93.validate_set(SHARES)
+    assert bip93.recover_master_seed(SHARES).hex() == 'd1808e096b35b209ca12132b264662a5'
+    everything = []
+    for x in range(32):
+        w = bip93.bech32_lagrange([s[5] for s in data], x)
+        expected = []
+        for i in range(len(data[0])):
+            n = 0
+            for j in range(len(data)):
+                n ^= _bech32_mul_loop(w[j], data[j][i])
+            expected.append(n)
+        assert bip93.ms32_interpolate(data, x) == expected
+        everything.append(expected)
+    assert bip93.ms32_interpolate_many(data, range(32)) == everything
+    assert bip93.derive_share(SHARES, 'D') == 'ms12namedll4f8jlh4e5vdvuldlfxu2jhdnlsm97xvenrxeg'
+    assert bip93.derive_share(SHARES, 's') == 'ms12names6xqguzttxkeqnjsjzv4jv3nz5k3kwgsphuh6evw'
+
+
+def test_bytes_layout():
+    data = bip93.validate_set(SHARES)
+    for s, d in zip(SHARES, data):
+        decoded = bip93.ms32_decode_bytes(s)
+        assert isinstance(decoded[4], bytes) and list(decoded[4]) == d
+        assert decoded[:4] == bip93.ms32_decode(s)[:4]
+        assert bip93.ms32_create_checksum(decoded[4]) == bip93.ms32_create_checksum(d)
+        assert bip93.ms32_encode('ms', decoded[4]) == bip93.ms32_encode('ms', d) == s.lower()
+    shares = [bytes(d) for d in data]
+    assert [list(b) for b in bip93.ms32_interpolate_bytes(shares, range(32))] == \
+        bip93.ms32_interpolate_many(data, range(32))
+    assert bip93.ms32_interpolate_bytes([bytearray(shares[0]), memoryview(shares[1])], [16]) == \
+        bip93.ms32_interpolate_bytes(shares, [16])
+    assert bip93.ms32_decode_bytes(SHARES[0][:-1] + 'q') == (None, None, None, None, None)
+
+
+def test_lagrange_cache():
+    bip93.set_lagrange_cache_size(4)
+    try:
+        data = bip93.validate_set(SHARES)
+        assert bip93.lagrange_cache_info().currsize == 0
+        first = bip93.ms32_interpolate(data, 16)
+        assert bip93.ms32_interpolate(data, 16) == first
+        info = bip93.lagrange_cache_info()
+        assert (info.hits, info.misses, info.maxsize) == (1, 1, 4)
+        bip93.ms32_interpolate_many(data, range(32))
+        assert bip93.lagrange_cache_info().currsize == 4
+        bip93.set_lagrange_cache_size(0)
+        assert bip93.ms32_interpolate(data, 16) == first
+        assert bip93.lagrange_cache_info().currsize == 0
+    finally:
+        bip93.set_lagrange_cache_size(1024)
+
+
+def test_fingerprint():
+    from pycoin.key.BIP32Node import BIP32Node
+    generator = getattr(BIP32Node, '_generator', None)
+    bip93._fingerprint_cache.clear()
+    for seed in [bytes(16), b'\xff' * 64] + [bytes(range(i, i + 32)) for i in range(8)]:
+        expected = BTC.keys.bip32_seed(seed).fingerprint()
+        assert bip93.fingerprint(seed) == bip93.convertbits(expected, 8, 5)[:4]
+        assert bip93.fingerprint(seed) == bip93.convertbits(expected, 8, 5)[:4]
+    assert getattr(BIP32Node, '_generator', None) is generator
+    # Cache keys must not be a plain hash of the seed.
+    assert hashlib.sha256(bytes(16)).digest() not in bip93._fingerprint_cache
+    assert len(bip93._fingerprint_cache) == 10
+
+
+def test_validate_data_set():
+    data = bip93.validate_set(SHARES)
+    assert bip93.validate_data_set(data)
+    assert not bip93.validate_data_set(data[:1])
+    assert bip93.validate_data_set(data[:1], len_must_match_k=False)
+    assert not bip93.validate_data_set([data[0], data[0]])
+    assert not bip93.validate_data_set([data[0], data[1][:-1]])
+    assert not bip93.validate_data_set([data[0], data[1][:4] + [0] + data[1][5:]])
+    assert not bip93.validate_data_set([data[0][:-1] + [32], data[1]])
+    assert not bip93.validate_data_set([])
+
+
+def test_encode_secret_verify():
+    secret = bytes.fromhex('d1808e096b35b209ca12132b264662a5')
+    expected = bip93.encode_secret(secret, ident='name')
+    assert bip93.decode_secret('ms', expected) == secret
+    assert bip93.encode_secret(secret, ident='name', verify=False) == expected
+    assert bip93.encode_secret(secret, ident='nameo', verify=False) is None
+    assert bip93.encode_secret(secret[:15], ident='name', verify=False) is None
+
+
+def test_recover_master_seeds():
+    seed = bytes.fromhex('d1808e096b35b209ca12132b264662a5')
+    other = bip93.encode_secret(bytes(range(16)), k='2', ident='name', index='s')
+    backup = app.bip93(XPRV, 'ms', 3, 5, 32, '????', 0)['codex32']
+    strings = [
+        SHARES[0], backup[0], bip93.derive_share(SHARES, 'D'), SHARES[1],   # 3 shares of one 2-of-n set
+        backup[3], backup[4].upper(),                                       # 3 of a 3-of-5 set
+        bip93.encode_secret(seed, ident='sure'),                            # a k=0 secret
+        'ms12namexxxxxxxxx',                                                # undecodable
+        backup[1].replace(backup[1][3:7], 'zzzz', 1),                       # bad checksum
+        bip93.derive_share(SHARES, 'E').replace('name', 'nomo'),            # bad checksum
+        bip93.encode_secret(seed, k='3', ident='half', index='a'),          # 1 of a 3-of-n set
+    ]
+    groups, invalid = bip93.recover_master_seeds(strings)
+    assert invalid == [7, 8, 9]
+    by_ident = {group['identifier']: group for group in groups}
+    assert by_ident['name']['positions'] == [0, 2, 3] and by_ident['name']['seed'] == seed
+    assert by_ident['sure']['seed'] == seed and by_ident['sure']['k'] == 0
+    assert by_ident['half']['error'] == bip93.ERR_THRESHOLD
+    [backup_group] = [group for group in groups if group['positions'] == [1, 4, 5]]
+    assert backup_group['error'] is None
+    assert backup_group['seed'] == bip93.recover_master_seed([backup[0], backup[3], backup[4]])
+
+    groups, _ = bip93.recover_master_seeds(SHARES + [other])
+    assert groups[0]['error'] == bip93.ERR_INCONSISTENT and groups[0]['seed'] is None
+    clash = bip93.encode_secret(bytes(range(16)), k='2', ident='name', index='a')
+    groups, _ = bip93.recover_master_seeds(SHARES + [clash])
+    assert groups[0]['error'] == bip93.ERR_DUPLICATE
+    groups, _ = bip93.recover_master_seeds(SHARES + [SHARES[0].lower()])
+    assert groups[0]['seed'] == seed
+
+
+if __name__ == "__main__":
+    pytest.main()
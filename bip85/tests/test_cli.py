@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import io
+import json
+import subprocess
+import sys
+
+from bip85 import cli
+import pytest
+
+XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
+
+
+def run(monkeypatch, capsys, *argv):
+    monkeypatch.setattr(sys, 'argv', ['bip85-cli', *argv])
+    cli.main()
+    return capsys.readouterr().out.splitlines()
+
+
+def test_dice_stream(monkeypatch, capsys):
+    whole = run(monkeypatch, capsys, '--xprv', XPRV, '--index', '0', 'dice', '--sides', '6', '--rolls', '10')
+    streamed = run(monkeypatch, capsys, '--xprv', XPRV, '--index', '0', 'dice', '--sides', '6', '--rolls', '10',
+                   '--stream')
+    assert whole[1:] == streamed == ['1,0,0,2,0,1,5,5,2,4']
+    assert XPRV in whole[0]
+
+    out = io.StringIO()
+    cli._write_rolls(iter(['1', '2', '3', '4', '5']), out, chunk_size=2)
+    assert out.getvalue() == '1,2,3,4,5\n'
+
+
+def test_batch(monkeypatch, capsys, tmp_path):
+    manifest = tmp_path / 'jobs.jsonl'
+    manifest.write_text('{"app": "hex", "index": 0, "width": 32, "id": "a"}\n'
+                        '\n'
+                        '{"app": "base85", "index": 0, "pwd_len": 12}\n'
+                        '{"app": "dice", "index": 0, "sides": 1, "rolls": 10}\n'
+                        'not json\n'
+                        '{"app": "bip93", "index": 0, "hrp": "ms", "threshold": 2, "n": 3, "byte_length": 16,'
+                        ' "identifier": "ab"}\n'
+                        '{"app": "wif", "index": 0}\n')
+    monkeypatch.setattr(sys, 'argv', ['bip85-cli', '--xprv', XPRV, 'batch', '--manifest', str(manifest)])
+    cli.main()
+    captured = capsys.readouterr()
+    assert '6 jobs in' in captured.err and 'jobs/sec' in captured.err
+    results = [json.loads(line) for line in captured.out.splitlines()]
+    assert results[0] == {'app': 'hex', 'index': 0, 'width': 32, 'id': 'a',
+                          'result': 'ea3ceb0b02ee8e587779c63f4b7b3a21e950a213f1ec53cab608d13e8796e6dc'}
+    assert results[1]['result'] == '_s`{TW89)i4`'
+    assert 'Sides' in results[2]['error']
+    assert 'error' in results[3]
+    assert results[4]['error'] == 'ValueError: ERROR: Identifier must be 4 characters'
+    assert results[5]['result'] == 'Kzyv4uF39d4Jrw2W7UryTHwZr1zQVNk4dAFyqE6BuMrMh1Za7uhp'
+
+
+def test_wif_bulk(monkeypatch, capsysbinary):
+    monkeypatch.setattr(sys, 'argv', ['bip85-cli', '--xprv', XPRV, '--index', '0', 'wif', '--count', '3'])
+    cli.main()
+    wifs = capsysbinary.readouterr().out.decode().splitlines()
+    assert len(wifs) == 3 and wifs[0] == 'Kzyv4uF39d4Jrw2W7UryTHwZr1zQVNk4dAFyqE6BuMrMh1Za7uhp'
+    monkeypatch.setattr(sys, 'argv', ['bip85-cli', '--xprv', XPRV, '--index', '0', 'wif', '--count', '3', '--raw'])
+    cli.main()
+    packed = capsysbinary.readouterr().out
+    assert [cli._bip85.secret_to_wif(packed[i:i + 32]) for i in range(0, 96, 32)] == wifs
+
+
+def test_codex32_audit(monkeypatch, capsys, tmp_path):
+    shares = ['MS12NAMEA320ZYXWVUTSRQPNMLKJHGFEDCAXRPP870HKKQRM', 'MS12NAMECACDEFGHJKLMNPQRSTUVWXYZ023FTR2GDZMPY6PN']
+    backups = tmp_path / 'backups.txt'
+    backups.write_text(f"{shares[0]}\n\n{shares[1]}\n")
+    monkeypatch.setattr(sys, 'argv', ['bip85-cli', 'codex32-audit', str(backups), '--show-seeds'])
+    with pytest.raises(SystemExit) as exit:
+        cli.main()
+    assert exit.value.code == 0
+    report = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert report == [{'hrp': 'ms', 'k': 2, 'identifier': 'name', 'lines': [1, 3], 'error': None,
+                       'seed': 'd1808e096b35b209ca12132b264662a5'}]
+    backups.write_text(f"{shares[0]}\nms1bad\n")
+    monkeypatch.setattr(sys, 'argv', ['bip85-cli', 'codex32-audit', str(backups)])
+    with pytest.raises(SystemExit) as exit:
+        cli.main()
+    assert exit.value.code == 1
+    report = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r['error'] for r in report] == ['threshold', 'decode'] and 'seed' not in report[0]
+
+
+def test_seed_required(monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        run(monkeypatch, capsys, '--index', '0', 'wif')
+    assert 'is required' in capsys.readouterr().err
+
+
+def test_index_required(monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        run(monkeypatch, capsys, '--xprv', XPRV, 'wif')
+
+
+def test_lazy_imports():
+    # Heavy dependencies must not load until a derivation needs them.
+    code = ("import sys, bip85, bip85.cli, bip85.app; "
+            "print(sorted(m for m in ('pycoin', 'mnemonic', 'base58', 'Crypto', 'bip85.bip93') "
+            "if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == '[]'
+
+
+@pytest.mark.parametrize('count', ['0', '-1'])
+@pytest.mark.parametrize('command', [['wif', '--raw', '--count'], ['wif', '--count'], ['rsa', '--count'],
+                                     ['rsa', '--count', '2', '--workers']])
+def test_count_must_be_positive(monkeypatch, capsys, command, count):
+    monkeypatch.setattr(sys, 'argv', ['bip85-cli', '--xprv', XPRV, '--index', '0'] + command + [count])
+    with pytest.raises(SystemExit) as excinfo:
+        cli.main()
+    assert excinfo.value.code == 2
+    captured = capsys.readouterr()
+    assert 'must be at least 1' in captured.err and not captured.out
+
+
+if __name__ == "__main__":
+    pytest.main()
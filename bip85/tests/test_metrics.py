@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bip85 import BIP85, app, metrics, parallel
+
+XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
+MNEMONIC = 'install scatter logic circle pencil average fall shoe quantum disease suspect usage'
+
+
+@pytest.fixture
+def sink():
+    sink = metrics.HistogramSink()
+    previous = metrics.set_sink(sink)
+    yield sink
+    metrics.set_sink(previous)
+
+
+def test_disabled():
+    assert not metrics.enabled()
+    assert metrics.span("encode") is metrics.span("hmac_sha512", "bip39")
+    metrics.count("derivations", "bip39")
+
+
+def test_histogram(sink):
+    app.hex(XPRV, 0, 32)
+    app.bip93(XPRV, 'ms', 2, 3, 16, '????', 0)
+    app.dice(XPRV, 6, 10, 0)
+    list(app.wif_range(XPRV, 0, 3))
+    snapshot = sink.snapshot()
+    counters = snapshot['counters']
+    assert counters[('derivations', 'hex')] == 1
+    assert counters[('derivations', 'wif')] == 3
+    assert counters[('node_cache', 'hit')] > 0
+    spans = snapshot['spans']
+    for key in [('derive_leaf', None), ('hmac_sha512', None), ('drng_squeeze', None),
+                ('encode', 'bip93'), ('encode', 'dice')]:
+        assert spans[key]['count'] > 0
+        assert sum(spans[key]['buckets']) == spans[key]['count']
+    BIP85(seed_cache_size=1).bip39_mnemonic_to_entropy("m/83696968'/0'/0'", MNEMONIC)
+    assert sink.snapshot()['counters'][('seed_cache', 'miss')] == 1
+    assert sink.snapshot()['spans'][('bip39_seed', None)]['count'] == 1
+    sink.reset()
+    assert sink.snapshot() == {'spans': {}, 'counters': {}}
+
+
+def test_parallel(sink):
+    expected = list(app.hex_range(XPRV, 16, 0, 3))
+    sink.reset()
+    assert list(parallel.derive_range('hex', XPRV, 0, 3, workers=2, chunk_size=1, width=16)) == expected
+    snapshot = sink.snapshot()
+    assert snapshot['counters'][('derivations', 'hex')] == 3
+    assert not any(label == 'other' for _, label in list(snapshot['counters']) + list(snapshot['spans']))
+
+
+def test_no_key_material(sink, caplog, tmp_path):
+    # Only fixed phase and application names may ever reach a sink.
+    names = {'bip39_seed', 'parse_xprv', 'derive_parent', 'derive_leaf', 'hmac_sha512', 'drng_squeeze',
+             'encode', 'derivations', 'node_cache', 'seed_cache'}
+    labels = {None, 'hit', 'miss'} | set(app._APP_NAMES.values())
+    prometheus = metrics.PrometheusSink(str(tmp_path / 'bip85.prom'))
+    for current in (sink, prometheus, metrics.LoggingSink()):
+        metrics.set_sink(current)
+        with caplog.at_level(logging.DEBUG, logger='bip85.metrics'):
+            BIP85().bip39_mnemonic_to_entropy("m/83696968'/0'/0'", MNEMONIC)
+            secret = app.hex(XPRV, 7, 16)
+    snapshot = sink.snapshot()
+    for name, label in list(snapshot['spans']) + list(snapshot['counters']):
+        assert name in names and label in labels
+    prometheus.write()
+    text = (tmp_path / 'bip85.prom').read_text()
+    for output in (text, caplog.text):
+        assert secret not in output and XPRV not in output and 'install' not in output
+    assert 'span encode[hex]' in caplog.text
+
+
+def test_prometheus(tmp_path):
+    sink = metrics.PrometheusSink(str(tmp_path / 'bip85.prom'), buckets=(0.5, 1.0))
+    sink.observe('encode', 'hex', 0.25)
+    sink.observe('encode', 'hex', 0.75)
+    sink.observe('encode', 'hex', 2.0)
+    sink.count('derivations', 'hex', 3)
+    sink.write()
+    lines = (tmp_path / 'bip85.prom').read_text().splitlines()
+    assert 'bip85_span_seconds_bucket{span="encode",label="hex",le="0.5"} 1' in lines
+    assert 'bip85_span_seconds_bucket{span="encode",label="hex",le="1.0"} 2' in lines
+    assert 'bip85_span_seconds_bucket{span="encode",label="hex",le="+Inf"} 3' in lines
+    assert 'bip85_span_seconds_count{span="encode",label="hex"} 3' in lines
+    assert 'bip85_events_total{event="derivations",label="hex"} 3' in lines
+
+
+def test_prometheus_concurrent_writes(tmp_path):
+    sink = metrics.PrometheusSink(str(tmp_path / 'bip85.prom'))
+    sink.count('derivations', 'hex', 1)
+    barrier = threading.Barrier(8)
+
+    def write(_):
+        barrier.wait()
+        for _ in range(20):
+            sink.write()
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(write, range(8)))
+    assert os.listdir(tmp_path) == ['bip85.prom']
+    assert 'bip85_events_total{event="derivations",label="hex"} 1' in (tmp_path / 'bip85.prom').read_text()
+
+
+if __name__ == "__main__":
+    pytest.main()
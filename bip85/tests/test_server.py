@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2025 Ben Westgate <benwestgate@protonmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import os
+import signal
+import stat
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bip85 import server
+import pytest
+
+XPRV = 'xprv9s21ZrQH143K2LBWUUQRFXhucrQqBpKdRRxNVq2zBqsx8HVqFk2uYo8kmbaLLHRdqtQpUm98uKfu3vca1LqdGhUtyoFnCNkfmXRyPXLjbKb'
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / 'bip85.sock')
+    loop = asyncio.new_event_loop()
+    srv = loop.run_until_complete(server.start_server(XPRV, path))
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    yield path
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    srv.close()
+    loop.run_until_complete(srv.wait_closed())
+    loop.close()
+
+
+def test_serve(socket_path):
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+    with server.Client(socket_path) as client:
+        assert client.derive('wif', index=0) == 'Kzyv4uF39d4Jrw2W7UryTHwZr1zQVNk4dAFyqE6BuMrMh1Za7uhp'
+        assert client.derive('base64', pwd_len=21, index=0) == 'dKLoepugzdVJvdL56ogNV'
+        assert client.request({'app': 'hex', 'index': 0, 'width': 32, 'id': 7}) == {
+            'id': 7, 'result': 'ea3ceb0b02ee8e587779c63f4b7b3a21e950a213f1ec53cab608d13e8796e6dc'}
+        with pytest.raises(ValueError, match='Sides'):
+            client.derive('dice', sides=1, rolls=10, index=0)
+        assert 'error' in client.request({'app': 'nope'})
+        assert client.request({'app': 'bip93', 'index': 0, 'hrp': 'ms', 'threshold': 2, 'n': 3,
+                               'byte_length': 16, 'identifier': 'ab'})['error'] == \
+            'ValueError: ERROR: Identifier must be 4 characters'
+        assert client.request({'app': 'bip39', 'index': 0, 'language': 'english', 'words': 11})['error']
+        assert client.derive('wif', index=0) == 'Kzyv4uF39d4Jrw2W7UryTHwZr1zQVNk4dAFyqE6BuMrMh1Za7uhp'
+
+
+def test_concurrent_clients(socket_path):
+    def derive(index):
+        with server.Client(socket_path) as client:
+            return client.derive('hex', index=index, width=16)
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(derive, range(16)))
+    assert len(set(results)) == 16
+
+
+def test_serve_keeps_existing_file(tmp_path):
+    path = tmp_path / 'not-a-socket'
+    path.write_text('keep me')
+    with pytest.raises(OSError):
+        server.serve(XPRV, str(path))
+    assert path.read_text() == 'keep me'
+
+
+_SERVE = 'from bip85 import server; server.serve({!r}, {!r})'
+
+
+def _start_daemon(path):
+    process = subprocess.Popen([sys.executable, '-c', _SERVE.format(XPRV, path)], stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while process.poll() is None and time.monotonic() < deadline:
+        try:
+            with server.Client(path) as client:
+                client.derive('hex', index=0, width=16)
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise AssertionError(process.communicate()[1].decode())
+
+
+def _derive(path):
+    with server.Client(path) as client:
+        return client.derive('wif', index=0)
+
+
+def test_two_daemons(tmp_path):
+    path = str(tmp_path / 'bip85.sock')
+    wif = 'Kzyv4uF39d4Jrw2W7UryTHwZr1zQVNk4dAFyqE6BuMrMh1Za7uhp'
+    daemons = []
+    try:
+        daemons.append(_start_daemon(path))
+        # A second daemon refuses a path that a live one answers on.
+        second = subprocess.run([sys.executable, '-c', _SERVE.format(XPRV, path)], capture_output=True, timeout=30)
+        assert second.returncode != 0 and b'already listening' in second.stderr
+        assert _derive(path) == wif
+        # A daemon only removes its own socket on exit.
+        os.unlink(path)
+        daemons.append(_start_daemon(path))
+        daemons[0].send_signal(signal.SIGTERM)
+        daemons[0].wait(timeout=30)
+        assert _derive(path) == wif
+        # A socket left by a killed daemon is stale and gets replaced.
+        daemons[1].kill()
+        daemons[1].wait(timeout=30)
+        assert os.path.exists(path)
+        daemons.append(_start_daemon(path))
+        daemons[2].send_signal(signal.SIGTERM)
+        daemons[2].wait(timeout=30)
+        assert not os.path.exists(path)
+    finally:
+        for daemon in daemons:
+            daemon.kill()
+            daemon.wait()
+
+
+if __name__ == "__main__":
+    pytest.main()